@@ -0,0 +1,80 @@
+import gc
+import json
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from typing import Dict, Any, List, Tuple
+
+from scheduler_benchmark import SimulatedExperiment, synthetic_experiment
+
+from src.experiment.status.base_status import BaseStatus
+from src.experiment.task.base_task import BaseTask
+
+
+def _parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(description="Measure the memory that night-shift needs per host.")
+    parser.add_argument("--hosts", type=int, nargs=2, default=[100, 500], metavar=("SMALL", "LARGE"),
+                        help="the per-host cost is derived from the difference between two cluster sizes (default: 100 500)")
+    parser.add_argument("--phases", type=int, default=5, help="number of phases (default: 5)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+
+    return parser.parse_args()
+
+
+def _measure(hosts: int, phases: int) -> Tuple[int, int, int]:
+    simulation: Namespace = Namespace(latency=0.0, jitter=0.0, failure_rate=0.0, seed=0)
+    definition: str = json.dumps(synthetic_experiment(hosts, phases, 1, 1))
+
+    gc.collect()
+    tracemalloc.start()
+    baseline: int = tracemalloc.get_traced_memory()[0]
+
+    # the experiment as it waits in the queue
+    experiment: SimulatedExperiment = SimulatedExperiment(json.loads(definition), simulation)
+    gc.collect()
+    loaded: int = tracemalloc.get_traced_memory()[0] - baseline
+
+    # the per-host tasks of all phases
+    tasks: List[Dict[str, List[BaseTask]]] = [phase.tasks_by_host() for phase in experiment.phases.values()]
+    gc.collect()
+    materialized: int = tracemalloc.get_traced_memory()[0] - baseline - loaded
+    del tasks
+
+    # the statuses of a running phase
+    experiment.runner.bind_parameters(0, 0, 1)
+
+    gc.collect()
+    before_run: int = tracemalloc.get_traced_memory()[0]
+    status: BaseStatus = next(iter(experiment.phases.values())).run()
+    gc.collect()
+    running: int = tracemalloc.get_traced_memory()[0] - before_run
+
+    tracemalloc.stop()
+    del status, experiment
+    return loaded, materialized, running
+
+
+def main():
+    arguments: Namespace = _parse_arguments()
+    small, large = arguments.hosts
+
+    # warms up caches, e.g. of imported modules and compiled templates, that are allocated only once
+    _measure(small, arguments.phases)
+
+    small_results: Tuple[int, int, int] = _measure(small, arguments.phases)
+    large_results: Tuple[int, int, int] = _measure(large, arguments.phases)
+
+    results: Dict[str, Any] = {"hosts": [small, large], "phases": arguments.phases}
+    for index, name in enumerate(("loaded", "tasks", "running-phase")):
+        results[f"{name}-bytes-per-host"] = (large_results[index] - small_results[index]) / (large - small)
+        results[f"{name}-kib-at-{large}-hosts"] = large_results[index] / 1024
+
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for key, value in results.items():
+        print(f"{key:>32}: {value:.1f}" if isinstance(value, float) else f"{key:>32}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Event, Lock
+from typing import Dict, Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from src.command.base_command_executor import BaseCommandExecutor
+from src.command.dummy_command_executor import DummyCommandExecutor
+from src.experiment.experiment import Experiment
+from src.experiment.phase import Phase
+from src.experiment.status.base_status import BaseStatus
+from src.experiment.task.base_task import BaseTask
+from src.metrics import Metrics
+
+
+class SimulatedExperiment(Experiment):
+
+    def __init__(self, properties: Dict[str, Any], arguments: Namespace):
+        self._arguments: Namespace = arguments
+        self._simulated_hosts: Dict[str, DummyCommandExecutor] = {}
+        self._simulated_hosts_lock: Lock = Lock()
+
+        super().__init__(properties)
+
+    def get_command_executor(self, task: BaseTask) -> BaseCommandExecutor:
+        # one executor per host, so that e.g. screen sessions of the same host are polled together
+        with self._simulated_hosts_lock:
+            if task.host not in self._simulated_hosts:
+                self._simulated_hosts[task.host] = DummyCommandExecutor(True,
+                                                                        "benchmark",
+                                                                        task.host,
+                                                                        timedelta(milliseconds=self._arguments.latency),
+                                                                        timedelta(milliseconds=self._arguments.jitter),
+                                                                        self._arguments.failure_rate,
+                                                                        self._arguments.seed + len(self._simulated_hosts))
+
+            return self._simulated_hosts[task.host]
+
+
+class PhaseTimer:
+
+    def __init__(self):
+        self.dispatch_times: List[float] = []
+        self.tasks: int = 0
+        self._run = Phase.run
+
+    def __enter__(self) -> "PhaseTimer":
+        timer: PhaseTimer = self
+
+        def run(phase: Phase) -> BaseStatus:
+            start: float = time.perf_counter()
+            try:
+                return timer._run(phase)
+            finally:
+                timer.dispatch_times.append(time.perf_counter() - start)
+                timer.tasks += sum(len(tasks) for tasks in phase.tasks_by_host().values())
+
+        Phase.run = run
+        return self
+
+    def __exit__(self, *args) -> None:
+        Phase.run = self._run
+
+
+def _parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(description="Measure the scheduling overhead of night-shift on a simulated cluster.")
+    parser.add_argument("--hosts", type=int, default=200, help="number of simulated hosts (default: 200)")
+    parser.add_argument("--phases", type=int, default=5, help="number of phases per repetition (default: 5)")
+    parser.add_argument("--repetitions", type=int, default=10, help="number of repetitions (default: 10)")
+    parser.add_argument("--max-parallel-hosts", type=int, default=1, help="hosts that are dispatched in parallel (default: 1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated round trip time in milliseconds (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum deviation of the latency in milliseconds (default: 0)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of a command to fail (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulated latencies and failures (default: 0)")
+    parser.add_argument("--metrics-dir", help="record metrics to this directory, e.g. to measure their overhead")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+
+    return parser.parse_args()
+
+
+def synthetic_experiment(hosts: int, phases: int, repetitions: int, max_parallel_hosts: int) -> Dict[str, Any]:
+    host_names: List[str] = [f"host{index:04d}" for index in range(hosts)]
+    phase_names: List[str] = [f"phase-{index}" for index in range(phases)]
+
+    return {
+        "name": "benchmark",
+        "hosts": host_names,
+        "max-parallel-hosts": max_parallel_hosts,
+        "parameters": {
+            "common": {
+                "ssh-user": "benchmark",
+                "root": "/tmp/{{experiment-name}}",
+                "output": "{{root}}/output",
+            },
+            "specific": [{"hosts": host_names[index::4], "role": f"role-{index}", "data": "{{output}}/{{role}}"}
+                         for index in range(4)],
+        },
+        "phases": [{
+            "name": name,
+            "do": {
+                "common": [
+                    {"type": "mkdir", "parameters": {"paths": ["{{output}}/{{experiment-repetition}}"]}},
+                    {"type": "echo", "parameters": {"file": "{{output}}/log", "lines": ["{{host}} {{experiment-repetition}}"]}},
+                    {"type": "screen", "parameters": {"name": f"{name}-{{{{host}}}}",
+                                                      "command": "run {{data}}",
+                                                      "timeout": "1m",
+                                                      "check-termination-interval": "0s"}},
+                    {"type": "sleep", "parameters": {"time": "0s"}},
+                ],
+                "specific": [
+                    {"hosts": host_names[::8], "type": "bash", "parameters": {"command": "collect {{data}}"}},
+                ],
+            },
+        } for name in phase_names],
+        "run": [{"repeat": repetitions, "phases": phase_names}],
+    }
+
+
+def _run(experiment: Experiment) -> Dict[str, Any]:
+    wake_up: Event = Event()
+    BaseStatus.set_change_listener(wake_up.set)
+
+    ticks: int = 0
+    failures: int = 0
+    run_time: float = 0.0
+
+    with PhaseTimer() as timer:
+        start: float = time.perf_counter()
+        while True:
+            tick_start: float = time.perf_counter()
+            try:
+                is_done: bool = experiment.run().is_done()
+            except BaseException as exception:
+                # the runner continues with the next phase, just like the scheduler does
+                logging.debug(f"Simulated failure: {exception}")
+                failures += 1
+                is_done = False
+
+            run_time += time.perf_counter() - tick_start
+            ticks += 1
+            if is_done:
+                break
+
+            # mirrors the main loop, which blocks until the next status might have changed
+            next_check: Optional[datetime] = experiment.next_check()
+            timeout: Optional[float] = None if next_check is None else max(0.0, (next_check - datetime.now()).total_seconds())
+            if timeout != 0.0:
+                wake_up.wait(timeout)
+            wake_up.clear()
+
+        wall_time: float = time.perf_counter() - start
+
+    BaseStatus.set_change_listener(None)
+
+    dispatch_time: float = sum(timer.dispatch_times)
+
+    return {
+        "phase-executions": len(timer.dispatch_times),
+        "tasks": timer.tasks,
+        "ticks": ticks,
+        "failures": failures,
+        "wall-time-s": wall_time,
+        "dispatch-latency-mean-ms": dispatch_time / max(1, len(timer.dispatch_times)) * 1000,
+        "dispatch-latency-max-ms": max(timer.dispatch_times, default=0.0) * 1000,
+        "polling-overhead-per-tick-ms": max(0.0, run_time - dispatch_time) / ticks * 1000,
+        "throughput-tasks-per-s": timer.tasks / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+def main():
+    arguments: Namespace = _parse_arguments()
+    logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.WARNING)
+
+    definition: str = json.dumps(synthetic_experiment(arguments.hosts,
+                                                      arguments.phases,
+                                                      arguments.repetitions,
+                                                      arguments.max_parallel_hosts))
+
+    if arguments.metrics_dir is not None:
+        Metrics.enable(Path(arguments.metrics_dir))
+
+    tracemalloc.start()
+
+    start: float = time.perf_counter()
+    experiment: SimulatedExperiment = SimulatedExperiment(json.loads(definition), arguments)
+    parse_time: float = time.perf_counter() - start
+    parse_memory: int = tracemalloc.get_traced_memory()[0]
+
+    results: Dict[str, Any] = {
+        "hosts": arguments.hosts,
+        "phases": arguments.phases,
+        "repetitions": arguments.repetitions,
+        "parse-time-ms": parse_time * 1000,
+        "experiment-memory-kib": parse_memory / 1024,
+    }
+    results.update(_run(experiment))
+    results["peak-memory-kib"] = tracemalloc.get_traced_memory()[1] / 1024
+
+    tracemalloc.stop()
+    Metrics.close()
+
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for key, value in results.items():
+        print(f"{key:>32}: {value:.3f}" if isinstance(value, float) else f"{key:>32}: {value}")
+
+
+if __name__ == "__main__":
+    main()
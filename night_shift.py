@@ -1,61 +1,184 @@
 import logging
-from datetime import datetime
+import sys
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta
 from pathlib import Path
-from queue import Queue
+from queue import Queue, Empty
 from threading import Thread
-from time import sleep
-from typing import Tuple, Optional, List
-
-from watchdog.events import FileSystemEvent
+from typing import Tuple, Optional, List, Any, Dict
 
 from src.directory_watcher import DirectoryWatcher
 from src.experiment.experiment import Experiment
+from src.experiment.plan_cache import PlanCache
+from src.experiment.status.base_status import BaseStatus
 from src.experiment_manager import ExperimentManager
-from src.utility import mkdir, to_datetime, to_timespan
+from src.experiment_queue import ExperimentQueue
+from src.metrics import Metrics
+from src.output_capture import OutputCapture
+from src.planner import Planner
+from src.utility import to_datetime, to_timespan
 
 SUPPORTED_FILE_EXTENSION: Tuple[str, ...] = (".zip", ".experiment")
 PAUSE_UNTIL: Optional[datetime] = None
+TAIL_LINES: int = 20
 
 
 def main():
+    arguments: Namespace = _parse_arguments()
+
     logging.basicConfig(format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO)
 
-    deployment_directory: Path = mkdir("./deploy/")
+    PlanCache.configure(Path("./.cache/plans/"), int(arguments.plan_cache_size * 1024 * 1024))
+
+    if arguments.plan is not None:
+        _plan(arguments)
+        return
+
+    if arguments.metrics_dir is not None:
+        Metrics.enable(Path(arguments.metrics_dir))
+
+    OutputCapture.configure(Path(arguments.log_dir))
 
-    watcher: DirectoryWatcher = DirectoryWatcher(deployment_directory, SUPPORTED_FILE_EXTENSION)
+    # deployments that are already waiting are enqueued on startup
+    deployment_directory: Path = Path("./deploy/")
+    deployment_directory.mkdir(parents=True, exist_ok=True)
+
+    experiment_manager: ExperimentManager = ExperimentManager(arguments.concurrent, timedelta(seconds=arguments.aging))
+
+    # deployments and stdin commands share one queue, so that the scheduler can block until either of them arrives
+    events: Queue = Queue()
+    watcher: DirectoryWatcher = DirectoryWatcher(deployment_directory,
+                                                 SUPPORTED_FILE_EXTENSION,
+                                                 events,
+                                                 experiment_manager.prepare,
+                                                 arguments.deployment_workers)
 
     logging.info(f"Ready to queue deployments.")
     logging.info(f"Please deploy to \"{deployment_directory.absolute()}\".")
     logging.info(f"Supported file extension are {SUPPORTED_FILE_EXTENSION}.")
 
-    experiment_manager: ExperimentManager = ExperimentManager()
+    # `None` only wakes up the scheduler, e.g. after a background task has been completed
+    BaseStatus.set_change_listener(lambda: events.put(None))
 
-    input_queue: Queue = Queue()
-    input_thread: Thread = Thread(target=_read_from_stdin, args=(input_queue,), daemon=True)
+    input_thread: Thread = Thread(target=_read_from_stdin, args=(events,), daemon=True)
     input_thread.start()
 
     while True:
         try:
-            while not watcher.events.empty():
-                event: FileSystemEvent = watcher.events.get()
-                experiment_manager.enqueue(Path(event.src_path))
-
-            if not input_queue.empty():
-                line: str = input_queue.get()
-                if line == "exit":
-                    break
-
-                _process_input(line, experiment_manager)
+            if not _process_events(_wait_for_events(events, _next_deadline(experiment_manager)), experiment_manager):
+                break
 
             experiment_manager.run()
-            sleep(1)
+            Metrics.export_if_due()
         except KeyboardInterrupt:
             break
 
     watcher.stop()
+    experiment_manager.tear_down()
+    Metrics.close()
     input_thread.join()
 
 
+def _parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(description="Queue and run experiments on remote hosts.")
+    parser.add_argument("--concurrent",
+                        action="store_true",
+                        help="run queued experiments concurrently as long as their hosts do not overlap")
+    parser.add_argument("--aging",
+                        type=float,
+                        default=600.0,
+                        metavar="SECONDS",
+                        help="waiting time that is worth one priority level of a queued experiment (default: 600)")
+    parser.add_argument("--deployment-workers",
+                        type=int,
+                        default=4,
+                        metavar="COUNT",
+                        help="number of threads that parse new deployments in the background (default: 4)")
+    parser.add_argument("--metrics-dir",
+                        metavar="DIRECTORY",
+                        help="export timing metrics as OpenMetrics text (metrics.txt) and JSON lines (events.jsonl)")
+    parser.add_argument("--log-dir",
+                        default="./logs/",
+                        metavar="DIRECTORY",
+                        help="write the output of bash tasks and of screen tasks with \"capture-output\" (requires "
+                             "GNU screen 4.06 or later on the host) to DIRECTORY/<experiment>/<phase>/<host>.log "
+                             "(default: ./logs/)")
+    parser.add_argument("--plan-cache-size",
+                        type=float,
+                        default=64.0,
+                        metavar="MEGABYTES",
+                        help="size of the cache of parsed experiment files in ./.cache/plans/, 0 disables it (default: 64)")
+    parser.add_argument("--plan",
+                        metavar="FILE",
+                        help="print the resolved commands and the estimated duration of an experiment without running it")
+    parser.add_argument("--rtt",
+                        type=float,
+                        default=0.05,
+                        metavar="SECONDS",
+                        help="round trip time that is assumed for every remote command while planning (default: 0.05)")
+    parser.add_argument("--measure-rtt",
+                        action="store_true",
+                        help="measure the round trip time to the SSH port of every host while planning")
+
+    return parser.parse_args()
+
+
+def _plan(arguments: Namespace) -> None:
+    experiment: Experiment = Experiment.load(Path(arguments.plan))
+    round_trip_times: Dict[str, timedelta] = {}
+
+    if arguments.measure_rtt:
+        for host in experiment.hosts:
+            port: int = int(experiment.parameters.value(host, "ssh-port")) if experiment.parameters.has_value(host, "ssh-port") else 22
+            round_trip_time: Optional[timedelta] = Planner.measure_round_trip_time(host, port)
+            if round_trip_time is None:
+                logging.warning(f"Unable to measure round trip time to {host}:{port}.")
+                continue
+
+            round_trip_times[host] = round_trip_time
+
+    Planner(experiment, round_trip_times, timedelta(seconds=arguments.rtt)).report(sys.stdout)
+
+
+def _next_deadline(experiment_manager: ExperimentManager) -> Optional[datetime]:
+    deadlines: List[datetime] = [deadline for deadline in (experiment_manager.next_check(), Metrics.next_export())
+                                 if deadline is not None]
+    return min(deadlines) if len(deadlines) > 0 else None
+
+
+def _wait_for_events(events: Queue, deadline: Optional[datetime]) -> List[Any]:
+    timeout: Optional[float] = None
+    if deadline is not None:
+        timeout = max(0.0, (deadline - datetime.now()).total_seconds())
+
+    pending_events: List[Any] = []
+    try:
+        pending_events.append(events.get(timeout=timeout) if timeout != 0.0 else events.get_nowait())
+        while not events.empty():
+            pending_events.append(events.get_nowait())
+    except Empty:
+        pass
+
+    return pending_events
+
+
+def _process_events(pending_events: List[Any], experiment_manager: ExperimentManager) -> bool:
+    for event in pending_events:
+        if event is None:
+            continue
+
+        if isinstance(event, ExperimentManager.Deployment):
+            experiment_manager.enqueue(event)
+            continue
+
+        if event == "exit":
+            return False
+
+        _process_input(event, experiment_manager)
+
+    return True
+
+
 def _process_input(line: str, experiment_manager: ExperimentManager) -> None:
     try:
         keyword, arguments = _extract_next_keyword(line)
@@ -68,6 +191,22 @@ def _process_input(line: str, experiment_manager: ExperimentManager) -> None:
             _resume(line, experiment_manager)
             return
 
+        if keyword == "queue":
+            _queue(arguments, experiment_manager)
+            return
+
+        if keyword == "prioritize":
+            _prioritize(arguments, experiment_manager)
+            return
+
+        if keyword == "tail":
+            _tail(arguments, experiment_manager)
+            return
+
+        if keyword == "cancel":
+            experiment_manager.cancel(int(arguments))
+            return
+
         logging.error(f"Unknown keyword: \"{keyword}\"!")
 
     except BaseException as exception:
@@ -92,6 +231,36 @@ def _resume(line: str, experiment_manager: ExperimentManager) -> None:
     Experiment.Runner.resume()
 
 
+def _queue(line: str, experiment_manager: ExperimentManager) -> None:
+    entries: List[ExperimentQueue.Entry] = experiment_manager.queued_experiments
+    logging.info(f"{len(entries)} experiment(s) queued.")
+
+    for entry in entries:
+        deadline: str = f", deadline {entry.experiment.deadline}" if entry.experiment.deadline is not None else ""
+        logging.info(f"  #{entry.identifier} {entry.experiment.name}: priority {entry.priority}, "
+                     f"enqueued {entry.enqueued:%Y-%m-%d %H:%M:%S}{deadline}")
+
+
+def _tail(line: str, experiment_manager: ExperimentManager) -> None:
+    # e.g. "tail" for all running experiments or "tail my-experiment"
+    experiments: List[Experiment] = [experiment for experiment in experiment_manager.running_experiments
+                                     if not line or experiment.name == line]
+    if len(experiments) == 0:
+        logging.info(f"There is no running experiment{f' named {line}' if line else ''}.")
+        return
+
+    for experiment in experiments:
+        for log, lines in OutputCapture.recent_lines(experiment.name).items():
+            logging.info(f"EXPERIMENT {experiment.name}: {log}")
+            for recent_line in lines[-TAIL_LINES:]:
+                logging.info(f"  {recent_line}")
+
+
+def _prioritize(line: str, experiment_manager: ExperimentManager) -> None:
+    identifier, priority = _extract_next_keyword(line)
+    experiment_manager.prioritize(int(identifier), int(priority))
+
+
 def _extract_next_keyword(line: str) -> Tuple[str, str]:
     split: List[str] = line.split(" ")
     if len(split) >= 2:
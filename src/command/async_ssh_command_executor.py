@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Thread, Lock
+from typing import List, Optional, Callable, BinaryIO
+
+from src.command.base_command_executor import BaseCommandExecutor
+from src.command.command_process import CommandProcess
+from src.command.command_result import CommandResult
+from src.metrics import Metrics
+
+CONTROL_SOCKET_DIRECTORY: Path = Path("~/.night-shift/ssh/").expanduser()
+CONTROL_PERSIST: str = "30m"
+MAX_SESSIONS_PER_HOST: int = 8
+LOGIN_TIMEOUT: timedelta = timedelta(seconds=30)
+
+
+class AsyncSSHCommandExecutor(BaseCommandExecutor):
+    class EventLoop:
+
+        _loop: Optional[asyncio.AbstractEventLoop] = None
+        _lock: Lock = Lock()
+
+        @staticmethod
+        def get() -> asyncio.AbstractEventLoop:
+            with AsyncSSHCommandExecutor.EventLoop._lock:
+                if AsyncSSHCommandExecutor.EventLoop._loop is None:
+                    if sys.version_info < (3, 8):
+                        # older versions can only spawn subprocesses from the event loop of the main thread
+                        raise Exception("The asynchronous SSH backend requires Python 3.8 or newer!")
+
+                    loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+                    Thread(target=loop.run_forever, name="ssh-event-loop", daemon=True).start()
+                    AsyncSSHCommandExecutor.EventLoop._loop = loop
+
+                return AsyncSSHCommandExecutor.EventLoop._loop
+
+    class Process(CommandProcess):
+
+        def __init__(self, future: Future, description: str, exit_handler: Optional[Callable[[], None]]):
+            self._future: Future = future
+            self._description: str = description
+            self._exit_handler: Optional[Callable[[], None]] = exit_handler
+            self._future.add_done_callback(self._on_exit)
+
+        def _on_exit(self, future: Future) -> None:
+            if not future.cancelled() and future.exception() is not None:
+                logging.error(f"{self._description}: {future.exception()}")
+
+            if self._exit_handler:
+                self._exit_handler()
+
+        @property
+        def result(self) -> Optional[CommandResult]:
+            if not self._future.done() or self._future.cancelled() or self._future.exception() is not None:
+                return None
+
+            return self._future.result()
+
+        def poll(self) -> bool:
+            return self._future.done()
+
+        @property
+        def is_finished(self) -> bool:
+            return self._future.done()
+
+        @property
+        def exit_code(self) -> Optional[int]:
+            if self._future.cancelled() or (self._future.done() and self._future.exception() is not None):
+                return -1
+
+            return self.result.exit_code if self.result else None
+
+        @property
+        def timed_out(self) -> bool:
+            return self.result.timed_out if self.result else False
+
+        @property
+        def deadline(self) -> Optional[datetime]:
+            # timeouts are enforced by the event loop
+            return None
+
+        def kill(self) -> None:
+            self._future.cancel()
+
+    def __init__(self, host: str, user: str, port: Optional[int] = None):
+        self._host: str = host
+        self._user: str = user
+        self._port: Optional[int] = port
+        self._loop: asyncio.AbstractEventLoop = AsyncSSHCommandExecutor.EventLoop.get()
+
+        # only accessed from within the event loop
+        self._sessions: Optional[asyncio.Semaphore] = None
+        self._master_lock: Optional[asyncio.Lock] = None
+        self._has_master: bool = False
+
+        CONTROL_SOCKET_DIRECTORY.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def user(self) -> str:
+        return self._user
+
+    def _ssh_arguments(self, command: Optional[str] = None) -> List[str]:
+        arguments: List[str] = ["ssh",
+                                "-o", "BatchMode=yes",
+                                "-o", "ControlMaster=auto",
+                                "-o", f"ControlPath={CONTROL_SOCKET_DIRECTORY}/%C",
+                                "-o", f"ControlPersist={CONTROL_PERSIST}"]
+        if self._port is not None:
+            arguments += ["-p", str(self._port)]
+
+        arguments.append(f"{self._user}@{self._host}")
+        if command is not None:
+            arguments.append(command)
+
+        return arguments
+
+    def _header(self) -> str:
+        return f"ASYNC SSH -> {self._user}@{self._host}"
+
+    async def run(self,
+                  command: str,
+                  timeout: Optional[timedelta] = None,
+                  stdout_handler: Optional[Callable[[str], None]] = None,
+                  stderr_handler: Optional[Callable[[str], None]] = None) -> CommandResult:
+        if self._sessions is None:
+            self._sessions = asyncio.Semaphore(MAX_SESSIONS_PER_HOST)
+            self._master_lock = asyncio.Lock()
+
+        await self._ensure_master()
+
+        async with self._sessions:
+            process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(*self._ssh_arguments(command),
+                                                                                        stdin=asyncio.subprocess.DEVNULL,
+                                                                                        stdout=asyncio.subprocess.PIPE,
+                                                                                        stderr=asyncio.subprocess.PIPE)
+            stdout: List[str] = []
+            stderr: List[str] = []
+            timed_out: bool = False
+
+            try:
+                await asyncio.wait_for(asyncio.gather(AsyncSSHCommandExecutor._read_lines(process.stdout, stdout, stdout_handler),
+                                                      AsyncSSHCommandExecutor._read_lines(process.stderr, stderr, stderr_handler),
+                                                      process.wait()),
+                                       timeout.total_seconds() if timeout else None)
+            except asyncio.TimeoutError:
+                timed_out = True
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+        self._log_response(self._header(), command, stdout)
+        return CommandResult(stdout, stderr, process.returncode, timed_out)
+
+    async def _ensure_master(self) -> None:
+        if self._has_master:
+            return
+
+        # the first connection becomes the control master that all further sessions are multiplexed over
+        async with self._master_lock:
+            if self._has_master:
+                return
+
+            start: float = time.perf_counter()
+            # the master is forked into the background and inherits stderr, a pipe would stay open until it exits
+            with tempfile.TemporaryFile() as error_file:
+                process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(*self._ssh_arguments("true"),
+                                                                                            stdin=asyncio.subprocess.DEVNULL,
+                                                                                            stdout=asyncio.subprocess.DEVNULL,
+                                                                                            stderr=error_file)
+                try:
+                    await asyncio.wait_for(process.wait(), LOGIN_TIMEOUT.total_seconds())
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+
+                error_file.seek(0)
+                error: str = error_file.read().decode("utf-8", errors="replace").strip()
+
+            Metrics.record(Metrics.SSH_LOGIN,
+                           time.perf_counter() - start,
+                           process.returncode != 0,
+                           {"executor": "async-ssh", "host": self._host})
+            if process.returncode != 0:
+                raise Exception(f"Unable to login to \"{self._host}\": {error or 'Timed out'}")
+
+            self._has_master = True
+            logging.debug(f"{self._header()}: Logged in.")
+
+    @staticmethod
+    async def _read_lines(stream: asyncio.StreamReader,
+                          lines: List[str],
+                          handler: Optional[Callable[[str], None]]) -> None:
+        while True:
+            line: bytes = await stream.readline()
+            if not line:
+                return
+
+            decoded_line: str = line.decode("utf-8", errors="replace").rstrip("\r\n")
+            # output of started commands is streamed to their handler instead of being collected
+            if handler:
+                handler(decoded_line)
+            else:
+                lines.append(decoded_line)
+
+    def execute_result(self, command: str, timeout: Optional[timedelta] = None) -> CommandResult:
+        with Metrics.timer(Metrics.COMMAND, executor="async-ssh", host=self._host):
+            return asyncio.run_coroutine_threadsafe(self.run(command, timeout), self._loop).result()
+
+    def execute(self, command: str) -> List[str]:
+        return list(filter(None, self.execute_result(command).stdout))
+
+    def start(self,
+              command: str,
+              timeout: Optional[timedelta] = None,
+              stdout_handler: Optional[Callable[[str], None]] = None,
+              stderr_handler: Optional[Callable[[str], None]] = None,
+              exit_handler: Optional[Callable[[], None]] = None) -> CommandProcess:
+        future: Future = asyncio.run_coroutine_threadsafe(self.run(command, timeout, stdout_handler, stderr_handler),
+                                                          self._loop)
+        return AsyncSSHCommandExecutor.Process(future, f"{self._header()}: \"{command}\"", exit_handler)
+
+    def execute_streaming(self,
+                          command: str,
+                          write_input: Optional[Callable[[BinaryIO], None]] = None,
+                          read_output: Optional[Callable[[BinaryIO], None]] = None) -> List[str]:
+        return self._execute_process(self._header(), self._ssh_arguments(command), write_input, read_output)
+
+    def interactive_arguments(self, command: str) -> List[str]:
+        return self._ssh_arguments(command)
+
+    def close(self) -> None:
+        # the control master outlives the executor (see `ControlPersist`), so that later experiments can reuse it
+        pass
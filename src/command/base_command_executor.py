@@ -1,6 +1,12 @@
 import logging
+import subprocess
 from abc import ABC, abstractmethod
-from typing import List
+from datetime import timedelta
+from threading import Thread
+from typing import List, Optional, Callable, BinaryIO
+
+from src.command.command_process import CommandProcess
+from src.command.finished_command_process import FinishedCommandProcess
 
 
 class BaseCommandExecutor(ABC):
@@ -9,11 +15,102 @@ class BaseCommandExecutor(ABC):
     def execute(self, command: str) -> List[str]:
         raise NotImplementedError
 
+    def start(self,
+              command: str,
+              timeout: Optional[timedelta] = None,
+              stdout_handler: Optional[Callable[[str], None]] = None,
+              stderr_handler: Optional[Callable[[str], None]] = None,
+              exit_handler: Optional[Callable[[], None]] = None) -> CommandProcess:
+        # executors that cannot run commands in the background execute them right away
+        for line in self.execute(command):
+            if stdout_handler:
+                stdout_handler(line)
+
+        if exit_handler:
+            exit_handler()
+
+        return FinishedCommandProcess()
+
+    def execute_streaming(self,
+                          command: str,
+                          write_input: Optional[Callable[[BinaryIO], None]] = None,
+                          read_output: Optional[Callable[[BinaryIO], None]] = None) -> List[str]:
+        raise NotImplementedError
+
+    def interactive_arguments(self, command: str) -> List[str]:
+        # arguments of a local process that runs the command on the host with stdin and stdout attached,
+        # e.g. to talk to a remote agent
+        raise NotImplementedError
+
     @staticmethod
     def _log_response(header: str, command: str, response: List[str]) -> None:
+        # responses may be large, they are only joined if they are logged at all
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+
         response_as_string: str = "<new line>".join(response) if len(response) > 0 else "<no response>"
         logging.debug(f"{header}: {command} >> {response_as_string}")
 
+    @staticmethod
+    def _execute_process(header: str,
+                         arguments: List[str],
+                         write_input: Optional[Callable[[BinaryIO], None]],
+                         read_output: Optional[Callable[[BinaryIO], None]]) -> List[str]:
+        process: subprocess.Popen = subprocess.Popen(arguments,
+                                                     stdin=subprocess.PIPE if write_input else subprocess.DEVNULL,
+                                                     stdout=subprocess.PIPE,
+                                                     stderr=subprocess.PIPE)
+        output: List[bytes] = []
+        errors: List[bytes] = []
+        read_errors: List[BaseException] = []
+
+        def read_stdout() -> None:
+            try:
+                if read_output:
+                    read_output(process.stdout)
+                else:
+                    output.append(process.stdout.read())
+            except BaseException as exception:
+                read_errors.append(exception)
+                process.kill()
+
+        readers: List[Thread] = [Thread(target=read_stdout, daemon=True),
+                                 Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        input_error: Optional[BaseException] = None
+        try:
+            if write_input:
+                write_input(process.stdin)
+                process.stdin.close()
+        except BrokenPipeError as exception:
+            # the process terminated early, its exit code and error output tell us why
+            input_error = exception
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            for reader in readers:
+                reader.join()
+
+            process.wait()
+
+        if len(read_errors) > 0:
+            raise read_errors[0]
+
+        if process.returncode != 0:
+            error: str = b"".join(errors).decode("utf-8", errors="replace").strip()
+            raise Exception(f"{header}: \"{arguments[-1]}\" failed with exit code {process.returncode}: {error}")
+
+        if input_error is not None:
+            raise input_error
+
+        response: List[str] = list(filter(None, b"".join(output).decode("utf-8", errors="replace").splitlines()))
+        BaseCommandExecutor._log_response(header, arguments[-1], response)
+
+        return response
+
     @abstractmethod
     def close(self) -> None:
         raise NotImplementedError
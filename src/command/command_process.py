@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+
+class CommandProcess(ABC):
+
+    @abstractmethod
+    def poll(self) -> bool:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def is_finished(self) -> bool:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def exit_code(self) -> Optional[int]:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def timed_out(self) -> bool:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def deadline(self) -> Optional[datetime]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def kill(self) -> None:
+        raise NotImplementedError
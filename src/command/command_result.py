@@ -0,0 +1,8 @@
+from typing import NamedTuple, List, Optional
+
+
+class CommandResult(NamedTuple):
+    stdout: List[str]
+    stderr: List[str]
+    exit_code: Optional[int]
+    timed_out: bool = False
@@ -1,23 +1,106 @@
-from typing import List, Optional
+import random
+import time
+from datetime import timedelta
+from io import BytesIO
+from typing import List, Optional, Callable, BinaryIO
 
 from src.command.base_command_executor import BaseCommandExecutor
+from src.command.command_process import CommandProcess
+from src.command.finished_command_process import FinishedCommandProcess
+from src.metrics import Metrics
 
 
 class DummyCommandExecutor(BaseCommandExecutor):
+    class NullStream:
 
-    def __init__(self, emulate_ssh: bool, ssh_user: Optional[str] = None, ssh_host: Optional[str] = None):
+        def write(self, data: bytes) -> int:
+            return len(data)
+
+        def flush(self) -> None:
+            pass
+
+        def close(self) -> None:
+            pass
+
+    def __init__(self,
+                 emulate_ssh: bool,
+                 ssh_user: Optional[str] = None,
+                 ssh_host: Optional[str] = None,
+                 latency: timedelta = timedelta(),
+                 jitter: timedelta = timedelta(),
+                 failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
         self._emulate_ssh: bool = emulate_ssh
         self._ssh_user: Optional[str] = ssh_user
         self._ssh_host: Optional[str] = ssh_host
 
+        # latency, jitter and failures are injected to simulate a cluster, e.g. for benchmarks
+        self._latency: timedelta = latency
+        self._jitter: timedelta = jitter
+        self._failure_rate: float = failure_rate
+        # the state of a random generator takes 2.5 KiB, so it is only created if it is needed
+        self._random: Optional[random.Random] = random.Random(seed) if jitter or failure_rate > 0 else None
+
     def execute(self, command: str) -> List[str]:
+        with Metrics.timer(Metrics.COMMAND, executor="dummy"):
+            if not self._simulate_round_trip():
+                raise Exception(f"{self._header()}: \"{command}\" failed with exit code 1: simulated failure")
+
+        self._log_response(self._header(), command, [])
+
+        return []
+
+    def start(self,
+              command: str,
+              timeout: Optional[timedelta] = None,
+              stdout_handler: Optional[Callable[[str], None]] = None,
+              stderr_handler: Optional[Callable[[str], None]] = None,
+              exit_handler: Optional[Callable[[], None]] = None) -> CommandProcess:
+        is_successful: bool = self._simulate_round_trip()
+        self._log_response(self._header(), command, [])
+
+        if exit_handler:
+            exit_handler()
+
+        return FinishedCommandProcess(0 if is_successful else 1)
+
+    def execute_streaming(self,
+                          command: str,
+                          write_input: Optional[Callable[[BinaryIO], None]] = None,
+                          read_output: Optional[Callable[[BinaryIO], None]] = None) -> List[str]:
+        if write_input:
+            write_input(DummyCommandExecutor.NullStream())
+
+        if read_output:
+            read_output(BytesIO())
+
+        if not self._simulate_round_trip():
+            raise Exception(f"{self._header()}: \"{command}\" failed with exit code 1: simulated failure")
+
+        self._log_response(self._header(), command, [])
+
+        return []
+
+    def interactive_arguments(self, command: str) -> List[str]:
+        # agents run locally and report every command as successful without running it
+        return ["/bin/sh", "-c", f"{command} --simulate"]
+
+    def _simulate_round_trip(self) -> bool:
+        delay: float = self._latency.total_seconds()
+        if self._random is not None and self._jitter:
+            delay += self._random.uniform(-self._jitter.total_seconds(), self._jitter.total_seconds())
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return self._random is None or self._random.random() >= self._failure_rate
+
+    def _header(self) -> str:
         header: str = "DUMMY"
         if self._emulate_ssh:
             header += f" SSH -> {self._ssh_user}@{self._ssh_host}"
 
-        self._log_response(header, command, [])
-
-        return []
+        return header
 
     def close(self) -> None:
         pass
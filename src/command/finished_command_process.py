@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from src.command.command_process import CommandProcess
+
+
+class FinishedCommandProcess(CommandProcess):
+
+    def __init__(self, exit_code: Optional[int] = None):
+        self._exit_code: Optional[int] = exit_code
+
+    def poll(self) -> bool:
+        return True
+
+    @property
+    def is_finished(self) -> bool:
+        return True
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return self._exit_code
+
+    @property
+    def timed_out(self) -> bool:
+        return False
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        return None
+
+    def kill(self) -> None:
+        pass
@@ -1,19 +1,118 @@
+import logging
 import os
-from io import TextIOWrapper
-from typing import List
+import signal
+import subprocess
+from datetime import datetime, timedelta
+from threading import Thread, Lock
+from typing import List, Optional, Callable, BinaryIO, IO
 
 from src.command.base_command_executor import BaseCommandExecutor
+from src.command.command_process import CommandProcess
+from src.metrics import Metrics
 
 
 class LocalCommandExecutor(BaseCommandExecutor):
+    class Process(CommandProcess):
+
+        def __init__(self,
+                     command: str,
+                     timeout: Optional[timedelta],
+                     stdout_handler: Optional[Callable[[str], None]],
+                     stderr_handler: Optional[Callable[[str], None]],
+                     exit_handler: Optional[Callable[[], None]]):
+            self._deadline: Optional[datetime] = datetime.now() + timeout if timeout else None
+            self._timed_out: bool = False
+            self._exit_handler: Optional[Callable[[], None]] = exit_handler
+            self._open_streams: int = 2
+            self._lock: Lock = Lock()
+
+            # a new session allows us to kill the whole process group on timeout
+            self._process: subprocess.Popen = subprocess.Popen(["/bin/sh", "-c", command],
+                                                               stdin=subprocess.DEVNULL,
+                                                               stdout=subprocess.PIPE,
+                                                               stderr=subprocess.PIPE,
+                                                               start_new_session=True)
+
+            for stream, handler in ((self._process.stdout, stdout_handler), (self._process.stderr, stderr_handler)):
+                Thread(target=self._read_lines, args=(stream, handler), daemon=True).start()
+
+        def _read_lines(self, stream: IO[bytes], handler: Optional[Callable[[str], None]]) -> None:
+            for line in iter(stream.readline, b""):
+                if handler:
+                    handler(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+
+            stream.close()
+
+            with self._lock:
+                self._open_streams -= 1
+                if self._open_streams > 0:
+                    return
+
+            self._process.wait()
+            if self._exit_handler:
+                self._exit_handler()
+
+        def poll(self) -> bool:
+            if self.is_finished:
+                return True
+
+            if self._deadline and datetime.now() >= self._deadline:
+                self._timed_out = True
+                self.kill()
+
+            return False
+
+        @property
+        def is_finished(self) -> bool:
+            with self._lock:
+                return self._open_streams == 0 and self._process.returncode is not None
+
+        @property
+        def exit_code(self) -> Optional[int]:
+            return self._process.returncode
+
+        @property
+        def timed_out(self) -> bool:
+            return self._timed_out
+
+        @property
+        def deadline(self) -> Optional[datetime]:
+            return self._deadline
+
+        def kill(self) -> None:
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
 
     def execute(self, command: str) -> List[str]:
-        output_stream: TextIOWrapper = os.popen(command)
+        with Metrics.timer(Metrics.COMMAND, executor="local"):
+            completed_process: subprocess.CompletedProcess = subprocess.run(["/bin/sh", "-c", command],
+                                                                            stdin=subprocess.DEVNULL,
+                                                                            stdout=subprocess.PIPE)
 
-        response: List[str] = output_stream.read().split("\r\n")
+        response: List[str] = list(filter(None, completed_process.stdout.decode("utf-8", errors="replace").splitlines()))
         self._log_response("BASH", command, response)
 
         return response
 
+    def start(self,
+              command: str,
+              timeout: Optional[timedelta] = None,
+              stdout_handler: Optional[Callable[[str], None]] = None,
+              stderr_handler: Optional[Callable[[str], None]] = None,
+              exit_handler: Optional[Callable[[], None]] = None) -> CommandProcess:
+        logging.debug(f"BASH: Starting \"{command}\".")
+        return LocalCommandExecutor.Process(command, timeout, stdout_handler, stderr_handler, exit_handler)
+
+    def execute_streaming(self,
+                          command: str,
+                          write_input: Optional[Callable[[BinaryIO], None]] = None,
+                          read_output: Optional[Callable[[BinaryIO], None]] = None) -> List[str]:
+        return self._execute_process("BASH", ["/bin/sh", "-c", command], write_input, read_output)
+
+    def interactive_arguments(self, command: str) -> List[str]:
+        return ["/bin/sh", "-c", command]
+
     def close(self) -> None:
         pass
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# This script is sent to the hosts and started by `RemoteAgent`, it must only depend on the standard library of
+# Python 3. It reads one request per line from stdin, e.g. {"id": 1, "command": "sleep 10"}, and pushes the
+# progress of the command back to stdout:
+#   {"ready": true, "pid": 1234}                                   once the agent is running
+#   {"id": 1, "started": true}                                     once the command has been started
+#   {"id": 1, "exit-code": 0, "finished": 1600000000.0, "duration": 10.0}
+#
+# `--simulate` reports every command as successful without running it, e.g. for tests and benchmarks.
+
+
+def main():
+    simulate = "--simulate" in sys.argv[1:]
+    output_lock = threading.Lock()
+
+    def send(message):
+        line = json.dumps(message) + "\n"
+        with output_lock:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+    def wait_for(identifier, process, start):
+        exit_code = process.wait()
+        finished = time.time()
+        send({"id": identifier, "exit-code": exit_code, "finished": finished, "duration": finished - start})
+
+    send({"ready": True, "pid": os.getpid()})
+
+    for line in iter(sys.stdin.readline, ""):
+        try:
+            request = json.loads(line)
+            identifier = request["id"]
+            command = request["command"]
+        except (ValueError, KeyError, TypeError):
+            continue
+
+        start = time.time()
+        if simulate:
+            send({"id": identifier, "started": True})
+            send({"id": identifier, "exit-code": 0, "finished": start, "duration": 0.0})
+            continue
+
+        try:
+            # a new session keeps the command alive if the agent terminates, e.g. because the connection is lost
+            process = subprocess.Popen(["/bin/sh", "-c", command],
+                                       stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL,
+                                       start_new_session=True)
+        except OSError as exception:
+            send({"id": identifier, "started": False, "error": str(exception)})
+            continue
+
+        send({"id": identifier, "started": True})
+        threading.Thread(target=wait_for, args=(identifier, process, start), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import base64
+import json
+import logging
+import subprocess
+from pathlib import Path
+from threading import Thread, Lock
+from typing import Dict, List, Optional, Callable, Set, Any
+
+from src.command.base_command_executor import BaseCommandExecutor
+
+
+class RemoteAgent:
+    class Request:
+
+        def __init__(self, command: str, on_exit: Callable[[int, float], None], on_lost: Callable[[bool], None]):
+            self.command: str = command
+            self.on_exit: Callable[[int, float], None] = on_exit
+            # called with whether the command has been started before the agent was lost
+            self.on_lost: Callable[[bool], None] = on_lost
+            self.is_started: bool = False
+
+    _agents: Dict[BaseCommandExecutor, "RemoteAgent"] = {}
+    # executors whose agent could not be started, e.g. because there is no Python on the host
+    _unavailable: Set[BaseCommandExecutor] = set()
+    # tasks of different hosts are dispatched concurrently
+    _agents_lock: Lock = Lock()
+    _command: Optional[str] = None
+
+    @staticmethod
+    def command() -> str:
+        # the agent is passed inline, so that nothing has to be installed on the hosts
+        if RemoteAgent._command is None:
+            script: bytes = (Path(__file__).parent / "night_shift_agent.py").read_bytes()
+            RemoteAgent._command = f"python3 -u -c 'import base64; exec(base64.b64decode(\"{base64.b64encode(script).decode()}\"))'"
+
+        return RemoteAgent._command
+
+    @staticmethod
+    def of(cmd: BaseCommandExecutor) -> Optional["RemoteAgent"]:
+        with RemoteAgent._agents_lock:
+            if cmd in RemoteAgent._unavailable:
+                return None
+
+            agent: Optional[RemoteAgent] = RemoteAgent._agents.get(cmd)
+            if agent is not None and agent.is_alive:
+                return agent
+
+            try:
+                arguments: List[str] = cmd.interactive_arguments(RemoteAgent.command())
+            except NotImplementedError:
+                RemoteAgent._unavailable.add(cmd)
+                return None
+
+            RemoteAgent._agents[cmd] = RemoteAgent(cmd, arguments)
+            return RemoteAgent._agents[cmd]
+
+    @staticmethod
+    def close(cmd: BaseCommandExecutor) -> None:
+        with RemoteAgent._agents_lock:
+            RemoteAgent._unavailable.discard(cmd)
+            agent: Optional[RemoteAgent] = RemoteAgent._agents.pop(cmd, None)
+
+        if agent is not None:
+            agent.stop()
+
+    def __init__(self, cmd: BaseCommandExecutor, arguments: List[str]):
+        self._cmd: BaseCommandExecutor = cmd
+        self._requests: Dict[int, RemoteAgent.Request] = {}
+        self._next_identifier: int = 1
+        self._lock: Lock = Lock()
+        self._is_alive: bool = True
+        self._is_ready: bool = False
+        self._is_stopped: bool = False
+
+        self._process: subprocess.Popen = subprocess.Popen(arguments,
+                                                           stdin=subprocess.PIPE,
+                                                           stdout=subprocess.PIPE,
+                                                           stderr=subprocess.DEVNULL)
+        self._thread: Thread = Thread(target=self._read_messages, daemon=True)
+        self._thread.start()
+
+    @property
+    def is_alive(self) -> bool:
+        return self._is_alive
+
+    def run(self, command: str, on_exit: Callable[[int, float], None], on_lost: Callable[[bool], None]) -> None:
+        with self._lock:
+            identifier: int = self._next_identifier
+            self._next_identifier += 1
+            self._requests[identifier] = RemoteAgent.Request(command, on_exit, on_lost)
+
+            try:
+                self._process.stdin.write((json.dumps({"id": identifier, "command": command}) + "\n").encode("utf-8"))
+                self._process.stdin.flush()
+                return
+            except (BrokenPipeError, ValueError):
+                # the agent is gone, unless its thread has already done so, the command is started without it
+                request: Optional[RemoteAgent.Request] = self._requests.pop(identifier, None)
+
+        if request is not None:
+            request.on_lost(False)
+
+    def _read_messages(self) -> None:
+        for line in iter(self._process.stdout.readline, b""):
+            try:
+                message: Dict[str, Any] = json.loads(line)
+            except ValueError:
+                # e.g. a message of the day that is printed by the login shell
+                continue
+
+            if "ready" in message:
+                self._is_ready = True
+                continue
+
+            self._handle(message)
+
+        self._is_alive = False
+        self._process.wait()
+
+        with self._lock:
+            requests: Dict[int, RemoteAgent.Request] = self._requests
+            self._requests = {}
+
+        if not self._is_ready and not self._is_stopped:
+            logging.warning(f"AGENT: Unable to start the agent (exit code {self._process.returncode}), "
+                            f"falling back to polling.")
+            with RemoteAgent._agents_lock:
+                RemoteAgent._unavailable.add(self._cmd)
+        elif not self._is_stopped:
+            logging.warning(f"AGENT: Connection lost with {len(requests)} pending command(s), falling back to polling.")
+
+        for request in requests.values():
+            request.on_lost(request.is_started)
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            request: Optional[RemoteAgent.Request] = self._requests.get(message.get("id"))
+            if request is None:
+                return
+
+            if "started" in message:
+                request.is_started = bool(message["started"])
+                if request.is_started:
+                    return
+
+            self._requests.pop(message["id"])
+
+        if "exit-code" in message:
+            logging.debug(f"AGENT: \"{request.command}\" finished with exit code {message['exit-code']} "
+                          f"after {message['duration']:.3f} seconds.")
+            request.on_exit(int(message["exit-code"]), float(message["duration"]))
+            return
+
+        logging.error(f"AGENT: Unable to start \"{request.command}\": {message.get('error')}")
+        request.on_lost(False)
+
+    def stop(self) -> None:
+        self._is_stopped = True
+        try:
+            # the agent terminates once its input is closed, commands that are still running are not affected
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        self._thread.join(timeout=5)
+        if self._thread.is_alive():
+            self._process.kill()
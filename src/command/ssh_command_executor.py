@@ -1,9 +1,13 @@
 import logging
-from typing import List
+from datetime import timedelta
+from typing import List, Optional, Callable, BinaryIO
 
-from pexpect import pxssh
+from pexpect import pxssh, TIMEOUT
 
 from src.command.base_command_executor import BaseCommandExecutor
+from src.command.command_process import CommandProcess
+from src.command.finished_command_process import FinishedCommandProcess
+from src.metrics import Metrics
 
 
 class SSHCommandExecutor(BaseCommandExecutor):
@@ -12,20 +16,101 @@ class SSHCommandExecutor(BaseCommandExecutor):
         self._host: str = host
         self._user: str = user
         self._ssh_session: pxssh.pxssh = pxssh.pxssh()
-        if not self._ssh_session.login(host, user):
-            raise Exception(f"Unable to login to \"{host}\"!")
+        # commands run in a shell that is nested in the login shell, so that it can be replaced by a fresh one
+        self._is_nested: bool = False
+        self._login_shell: Optional[str] = None
+        with Metrics.timer(Metrics.SSH_LOGIN, executor="ssh", host=host):
+            if not self._ssh_session.login(host, user):
+                raise Exception(f"Unable to login to \"{host}\"!")
 
+        self._login_shell = self._process_identifier()
         logging.debug(f"SSH -> {self._user}@{self._host}: Logged in.")
 
-    def execute(self, command: str) -> List[str]:
-        self._ssh_session.sendline(command)
-        self._ssh_session.prompt()
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def user(self) -> str:
+        return self._user
+
+    def reset(self, timeout: int = 10) -> bool:
+        # pooled connections are handed over to other experiments, which must neither see the working directory,
+        # variables and options of the previous one nor be affected by them. The login shell itself stays untouched
+        if not self._ssh_session.isalive():
+            return False
+
+        try:
+            if self._is_nested:
+                self._is_nested = False
+                self._ssh_session.sendline("exit")
+                # e.g. stopped jobs keep the nested shell from exiting
+                if not self._ssh_session.prompt(timeout=timeout) or self._process_identifier() != self._login_shell:
+                    return False
 
-        response: List[str] = list(filter(None, self._ssh_session.before.decode("utf-8").split("\r\n")[1:]))
+            self._ssh_session.sendline("$SHELL")
+            self._is_nested = True
+            return self._ssh_session.set_unique_prompt()
+        except BaseException as exception:
+            logging.debug(f"SSH -> {self._user}@{self._host}: Reset failed: {exception}")
+            return False
+
+    def _process_identifier(self) -> Optional[str]:
+        response: List[str] = self.execute("echo $$")
+        return response[0].strip() if len(response) > 0 else None
+
+    def execute(self, command: str) -> List[str]:
+        response: List[str] = []
+        self._execute_lines(command, response.append)
         self._log_response(f"SSH -> {self._user}@{self._host}", command, response)
 
         return response
 
+    def start(self,
+              command: str,
+              timeout: Optional[timedelta] = None,
+              stdout_handler: Optional[Callable[[str], None]] = None,
+              stderr_handler: Optional[Callable[[str], None]] = None,
+              exit_handler: Optional[Callable[[], None]] = None) -> CommandProcess:
+        # the interactive session still runs the command right away, but its output is not collected
+        self._execute_lines(command, stdout_handler if stdout_handler else lambda line: None)
+
+        if exit_handler:
+            exit_handler()
+
+        return FinishedCommandProcess()
+
+    def _execute_lines(self, command: str, handle_line: Callable[[str], None]) -> None:
+        with Metrics.timer(Metrics.COMMAND, executor="ssh", host=self._host):
+            self._ssh_session.sendline(command)
+
+            # matching line by line keeps pexpect from buffering and searching the whole response
+            is_echo: bool = True
+            while True:
+                index: int = self._ssh_session.expect([self._ssh_session.PROMPT, "\r\n", TIMEOUT])
+                line: str = self._ssh_session.before.decode("utf-8", errors="replace")
+
+                # the first line is the echo of the command
+                if not is_echo and line:
+                    handle_line(line)
+
+                is_echo = False
+                if index != 1:
+                    return
+
+    def execute_streaming(self,
+                          command: str,
+                          write_input: Optional[Callable[[BinaryIO], None]] = None,
+                          read_output: Optional[Callable[[BinaryIO], None]] = None) -> List[str]:
+        # binary payloads cannot be pushed through the interactive shell, so they get a dedicated ssh process
+        return self._execute_process(f"SSH -> {self._user}@{self._host}",
+                                     ["ssh", "-o", "BatchMode=yes", f"{self._user}@{self._host}", command],
+                                     write_input,
+                                     read_output)
+
+    def interactive_arguments(self, command: str) -> List[str]:
+        return ["ssh", "-o", "BatchMode=yes", f"{self._user}@{self._host}", command]
+
     def close(self) -> None:
         logging.debug(f"SSH -> {self._user}@{self._host}: Close.")
         self._ssh_session.close()
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Tuple, Optional
+
+from src.command.ssh_command_executor import SSHCommandExecutor
+
+
+class SSHConnectionPool:
+    class IdleConnection:
+
+        def __init__(self, connection: SSHCommandExecutor):
+            self._connection: SSHCommandExecutor = connection
+            self._idle_since: datetime = datetime.now()
+
+        @property
+        def connection(self) -> SSHCommandExecutor:
+            return self._connection
+
+        @property
+        def idle_since(self) -> datetime:
+            return self._idle_since
+
+    _shared: Optional["SSHConnectionPool"] = None
+
+    @staticmethod
+    def shared() -> "SSHConnectionPool":
+        if SSHConnectionPool._shared is None:
+            SSHConnectionPool._shared = SSHConnectionPool()
+
+        return SSHConnectionPool._shared
+
+    def __init__(self, idle_timeout: timedelta = timedelta(minutes=30), max_size: int = 256):
+        self._idle_timeout: timedelta = idle_timeout
+        self._max_size: int = max_size
+        self._idle_connections: Dict[Tuple[str, str], List[SSHConnectionPool.IdleConnection]] = {}
+        self._lock: Lock = Lock()
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(len(connections) for connections in self._idle_connections.values())
+
+    def next_expiry(self) -> Optional[datetime]:
+        with self._lock:
+            if len(self._idle_connections) == 0:
+                return None
+
+            return min(connections[0].idle_since for connections in self._idle_connections.values()) + self._idle_timeout
+
+    def acquire(self, host: str, user: str) -> SSHCommandExecutor:
+        self.evict_expired()
+
+        while True:
+            idle_connection: Optional[SSHConnectionPool.IdleConnection] = self._pop_idle_connection(host, user)
+            if idle_connection is None:
+                break
+
+            # a fresh shell also proves that the connection is still alive
+            if idle_connection.connection.reset():
+                logging.debug(f"SSH POOL: Reusing connection to {user}@{host}.")
+                return idle_connection.connection
+
+            logging.debug(f"SSH POOL: Dropping dead connection to {user}@{host}.")
+            idle_connection.connection.close()
+
+        connection: SSHCommandExecutor = SSHCommandExecutor(host, user)
+        # experiments always run in a shell of their own, whether the connection is new or reused
+        if not connection.reset():
+            connection.close()
+            raise Exception(f"Unable to start a shell on \"{host}\"!")
+
+        return connection
+
+    def release(self, connection: SSHCommandExecutor) -> None:
+        evicted_connections: List[SSHCommandExecutor] = []
+
+        with self._lock:
+            key: Tuple[str, str] = (connection.user, connection.host)
+            if key not in self._idle_connections:
+                self._idle_connections[key] = []
+
+            self._idle_connections[key].append(SSHConnectionPool.IdleConnection(connection))
+
+            while sum(len(connections) for connections in self._idle_connections.values()) > self._max_size:
+                evicted_connections.append(self._pop_least_recently_used_connection())
+
+        for evicted_connection in evicted_connections:
+            logging.debug(f"SSH POOL: Evicting connection to {evicted_connection.user}@{evicted_connection.host} (pool is full).")
+            evicted_connection.close()
+
+    def evict_expired(self) -> None:
+        expired_connections: List[SSHCommandExecutor] = []
+        expired_before: datetime = datetime.now() - self._idle_timeout
+
+        with self._lock:
+            for key in list(self._idle_connections):
+                expired_connections += [idle_connection.connection
+                                        for idle_connection in self._idle_connections[key]
+                                        if idle_connection.idle_since < expired_before]
+                self._idle_connections[key] = [idle_connection
+                                               for idle_connection in self._idle_connections[key]
+                                               if idle_connection.idle_since >= expired_before]
+                if len(self._idle_connections[key]) == 0:
+                    self._idle_connections.pop(key)
+
+        for expired_connection in expired_connections:
+            logging.debug(f"SSH POOL: Evicting connection to {expired_connection.user}@{expired_connection.host} (idle timeout).")
+            expired_connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle_connections: Dict[Tuple[str, str], List[SSHConnectionPool.IdleConnection]] = self._idle_connections
+            self._idle_connections = {}
+
+        for key in idle_connections:
+            for idle_connection in idle_connections[key]:
+                idle_connection.connection.close()
+
+    def _pop_idle_connection(self, host: str, user: str) -> Optional["SSHConnectionPool.IdleConnection"]:
+        with self._lock:
+            key: Tuple[str, str] = (user, host)
+            if key not in self._idle_connections:
+                return None
+
+            # most recently used connections are the least likely to have been dropped by the remote
+            idle_connection: SSHConnectionPool.IdleConnection = self._idle_connections[key].pop()
+            if len(self._idle_connections[key]) == 0:
+                self._idle_connections.pop(key)
+
+            return idle_connection
+
+    def _pop_least_recently_used_connection(self) -> SSHCommandExecutor:
+        key: Tuple[str, str] = min(self._idle_connections, key=lambda k: self._idle_connections[k][0].idle_since)
+        idle_connection: SSHConnectionPool.IdleConnection = self._idle_connections[key].pop(0)
+        if len(self._idle_connections[key]) == 0:
+            self._idle_connections.pop(key)
+
+        return idle_connection.connection
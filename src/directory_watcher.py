@@ -1,60 +1,162 @@
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from queue import Queue
-from threading import Thread
-from time import sleep
-from typing import Optional, Tuple, Union
+from threading import Thread, Lock, Event
+from typing import Optional, Tuple, Callable, Any, Dict, Set
 
-from watchdog.events import PatternMatchingEventHandler, \
-    DirCreatedEvent, FileCreatedEvent
+from watchdog.events import PatternMatchingEventHandler, FileSystemEvent
 from watchdog.observers import Observer
 
 
 class DirectoryWatcher:
     class EventHandler(PatternMatchingEventHandler):
 
-        def __init__(self, file_extensions: Optional[Tuple[str, ...]] = None):
+        def __init__(self, file_extensions: Tuple[str, ...], on_change: Callable[[str, bool], None]):
             super().__init__()
-            self._file_extensions: Tuple[str, ...] = file_extensions or (".zip", ".json")
-            self._event_queue: "Queue[FileCreatedEvent]" = Queue()
-            self._thread: Optional[Thread] = None
+            self._file_extensions: Tuple[str, ...] = file_extensions
+            self._on_change: Callable[[str, bool], None] = on_change
 
-        def on_created(self, event: Union[DirCreatedEvent, FileCreatedEvent]) -> None:
-            if not isinstance(event, FileCreatedEvent):
-                return
+        def on_created(self, event: FileSystemEvent) -> None:
+            self._notify(event, event.src_path, False)
 
-            if not event.src_path.endswith(self._file_extensions):
-                return
+        def on_modified(self, event: FileSystemEvent) -> None:
+            self._notify(event, event.src_path, False)
+
+        def on_moved(self, event: FileSystemEvent) -> None:
+            self._notify(event, event.dest_path, False)
 
-            logging.info(f"File \"{event.src_path}\" was just created.")
-            self._event_queue.put(event)
+        def on_closed(self, event: FileSystemEvent) -> None:
+            # only reported by newer versions of watchdog, older ones rely on the size and time of modification
+            self._notify(event, event.src_path, True)
 
-        def start(self) -> None:
-            if self._thread:
-                self._thread.join()
+        def _notify(self, event: FileSystemEvent, path: str, is_closed: bool) -> None:
+            if event.is_directory or not path.endswith(self._file_extensions):
+                return
 
-            self._thread = Thread(target=DirectoryWatcher.EventHandler._sleep, daemon=True)
-            self._thread.start()
+            self._on_change(path, is_closed)
 
-        @staticmethod
-        def _sleep() -> None:
-            while True:
-                sleep(1)
+    class PendingFile:
 
-        @property
-        def events(self) -> "Queue[FileCreatedEvent]":
-            return self._event_queue
+        def __init__(self, since: float):
+            self.signature: Optional[Tuple[int, int]] = None
+            self.since: float = since
+            self.is_closed: bool = False
 
-    def __init__(self, directory: Path, file_extensions: Optional[Tuple[str, ...]] = None):
+    def __init__(self,
+                 directory: Path,
+                 file_extensions: Optional[Tuple[str, ...]] = None,
+                 event_queue: Optional[Queue] = None,
+                 prepare: Callable[[Path], Any] = lambda path: path,
+                 workers: int = 4,
+                 settle_time: float = 1.0,
+                 poll_interval: float = 0.25):
         self._directory: Path = directory
-        self._event_handler: DirectoryWatcher.EventHandler = DirectoryWatcher.EventHandler(file_extensions)
+        self._file_extensions: Tuple[str, ...] = file_extensions or (".zip", ".json")
+        self._event_queue: Queue = event_queue or Queue()
+        self._prepare: Callable[[Path], Any] = prepare
+        self._settle_time: float = settle_time
+        self._poll_interval: float = poll_interval
+
+        # files are only handed over once their size and time of modification have settled, so that e.g. a large
+        # archive is not opened while it is still being copied
+        self._pending_files: Dict[str, DirectoryWatcher.PendingFile] = {}
+        self._files_in_progress: Set[str] = set()
+        self._lock: Lock = Lock()
+        self._has_pending_files: Event = Event()
+        self._is_stopped: bool = False
+
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deployment")
+        self._thread: Thread = Thread(target=self._watch_pending_files, daemon=True)
+        self._thread.start()
+
         self._observer: Observer = Observer()
-        self._observer.schedule(self._event_handler, str(directory.absolute()))
+        self._observer.schedule(DirectoryWatcher.EventHandler(self._file_extensions, self._on_change), str(directory.absolute()))
         self._observer.start()
 
+        # deployments that arrived while night-shift was not running
+        for file in sorted(directory.iterdir()):
+            if file.is_file() and file.name.endswith(self._file_extensions):
+                self._on_change(str(file), False)
+
+    def _on_change(self, path: str, is_closed: bool) -> None:
+        with self._lock:
+            # bursts of events for the same file are coalesced into a single pending file
+            if path not in self._pending_files:
+                logging.info(f"Detected deployment \"{path}\".")
+                self._pending_files[path] = DirectoryWatcher.PendingFile(time.monotonic())
+
+            # writing to the file again after it has been closed resets the close
+            self._pending_files[path].is_closed = is_closed
+
+            self._has_pending_files.set()
+
+    def _watch_pending_files(self) -> None:
+        while True:
+            self._has_pending_files.wait()
+            if self._is_stopped:
+                return
+
+            time.sleep(self._poll_interval)
+            self._submit_settled_files()
+
+    def _submit_settled_files(self) -> None:
+        now: float = time.monotonic()
+
+        with self._lock:
+            for path, pending_file in list(self._pending_files.items()):
+                # a file that is deployed again while the previous one is prepared waits until that is done
+                if path in self._files_in_progress:
+                    continue
+
+                try:
+                    stat: os.stat_result = os.stat(path)
+                except FileNotFoundError:
+                    self._pending_files.pop(path)
+                    continue
+
+                signature: Tuple[int, int] = (stat.st_size, stat.st_mtime_ns)
+                if signature != pending_file.signature:
+                    pending_file.signature = signature
+                    pending_file.since = now
+                    if not pending_file.is_closed:
+                        continue
+
+                if not pending_file.is_closed and now - pending_file.since < self._settle_time:
+                    continue
+
+                self._pending_files.pop(path)
+                self._files_in_progress.add(path)
+                self._executor.submit(self._prepare_file, path)
+
+            if len(self._pending_files) == 0:
+                self._has_pending_files.clear()
+
+    def _prepare_file(self, path: str) -> None:
+        try:
+            self._event_queue.put(self._prepare(Path(path)))
+        except BaseException as exception:
+            logging.error(f"Unable to prepare \"{path}\": {exception}")
+        finally:
+            with self._lock:
+                self._files_in_progress.discard(path)
+                if path in self._pending_files:
+                    self._has_pending_files.set()
+
     def stop(self) -> None:
         self._observer.stop()
+        self._observer.join()
+
+        with self._lock:
+            self._is_stopped = True
+            self._has_pending_files.set()
+
+        self._thread.join()
+        # deployments that are being prepared already have a journal, so they are not lost if we wait for them
+        self._executor.shutdown(wait=True)
 
     @property
-    def events(self) -> "Queue[FileCreatedEvent]":
-        return self._event_handler.events
+    def events(self) -> Queue:
+        return self._event_queue
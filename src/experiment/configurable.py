@@ -1,17 +1,96 @@
+import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Callable, Optional
+from threading import Lock
+from typing import Any, Dict, Callable, Optional, Tuple
+from weakref import WeakValueDictionary
 
 
 class Configurable(ABC):
+    class InternedProperties(dict):
+        # plain dicts cannot be referenced weakly
+        __slots__ = ("__weakref__", "cached_properties")
+
+        def __init__(self, properties: Dict[str, Any]):
+            super().__init__(properties)
+            self.cached_properties: Optional[Dict[str, Any]] = None
+
+    __slots__ = ("_properties", "_cached_properties")
+
+    # configurables whose cached properties only depend on their own properties share both with all equal instances
+    _is_shareable: bool = False
+    _interned_properties: "WeakValueDictionary[Tuple[type, str], Configurable.InternedProperties]" = WeakValueDictionary()
+    _interned_properties_lock: Lock = Lock()
 
     def __init__(self, properties: Dict[str, Any]):
-        self._properties: Dict[str, Any] = {}
+        lowercase_properties: Dict[str, Any] = {item.lower(): properties[item] for item in properties}
+
+        if not self._is_shareable:
+            self._properties: Dict[str, Any] = lowercase_properties
+            self._cached_properties: Dict[str, Any] = {}
+            self._initialize_cache()
+            return
+
+        interned_properties: Configurable.InternedProperties = self._intern(lowercase_properties)
+        self._properties = interned_properties
 
-        for item in properties:
-            self._properties[item.lower()] = properties[item]
+        if interned_properties.cached_properties is not None:
+            self._cached_properties = interned_properties.cached_properties
+            return
 
-        self._cached_properties: Dict[str, Any] = {}
+        self._cached_properties = {}
         self._initialize_cache()
+        interned_properties.cached_properties = self._cached_properties
+
+    def _intern(self, properties: Dict[str, Any]) -> "Configurable.InternedProperties":
+        key: Tuple[type, str] = (type(self), json.dumps(properties, sort_keys=True, default=repr))
+
+        with Configurable._interned_properties_lock:
+            interned_properties: Optional[Configurable.InternedProperties] = Configurable._interned_properties.get(key)
+            if interned_properties is None:
+                interned_properties = Configurable.InternedProperties(properties)
+                Configurable._interned_properties[key] = interned_properties
+
+        return interned_properties
+
+    def __copy__(self) -> "Configurable":
+        # copies, e.g. the per-host views of tasks, share the interned properties without interning them again
+        configurable: Configurable = type(self).__new__(type(self))
+        for name, value in self._state().items():
+            setattr(configurable, name, value)
+
+        return configurable
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self._state()
+
+    def _state(self) -> Dict[str, Any]:
+        # slots of all classes of the hierarchy, subclasses without slots also have a dictionary
+        state: Dict[str, Any] = dict(getattr(self, "__dict__", {}))
+        for configurable_type in type(self).__mro__:
+            for name in getattr(configurable_type, "__slots__", ()):
+                if name != "__weakref__" and hasattr(self, name):
+                    state[name] = getattr(self, name)
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        if not self._is_shareable:
+            return
+
+        # unpickled configurables share their properties with equal instances again
+        interned_properties: Configurable.InternedProperties = self._intern(dict(self._properties))
+        if interned_properties.cached_properties is None:
+            interned_properties.cached_properties = self._cached_properties
+
+        self._properties = interned_properties
+        self._cached_properties = interned_properties.cached_properties
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        return self._properties
 
     @abstractmethod
     def _initialize_cache(self):
@@ -1,20 +1,34 @@
+import importlib
 import json
 import logging
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from threading import Lock
+from typing import List, Dict, Any, Optional, Set, Tuple
+from zipfile import ZipFile
 
+from src.command.async_ssh_command_executor import AsyncSSHCommandExecutor
 from src.command.base_command_executor import BaseCommandExecutor
 from src.command.dummy_command_executor import DummyCommandExecutor
 from src.command.local_command_executor import LocalCommandExecutor
+from src.command.remote_agent import RemoteAgent
 from src.command.ssh_command_executor import SSHCommandExecutor
+from src.command.ssh_connection_pool import SSHConnectionPool
 from src.experiment.configurable import Configurable
+from src.experiment.journal import Journal
 from src.experiment.parameters import Parameters
 from src.experiment.phase import Phase
+from src.experiment.plan_cache import PlanCache
 from src.experiment.status.base_status import BaseStatus
 from src.experiment.status.done_status import DoneStatus
 from src.experiment.status.not_done_status import NotDoneStatus
+from src.experiment.sweep import Sweep
 from src.experiment.task.base_task import BaseTask
+from src.metrics import Metrics
+from src.output_capture import OutputCapture
+from src.utility import to_datetime, to_timespan
 
 
 class Experiment(Configurable):
@@ -40,9 +54,34 @@ class Experiment(Configurable):
             self._properties: List[Dict[str, Any]] = properties
             self._properties_index: int = 0
             self._experiment: "Experiment" = experiment
+            # sweeps only know their dimensions, points are bound one after another while the experiment runs
+            self._sweeps: List[Sweep] = [Sweep(configuration["sweep"] if "sweep" in configuration else {})
+                                         for configuration in properties]
+            self._current_point: int = 0
             self._current_repetition: int = 0
             self._current_pipeline: List[str] = []
             self._current_phase_status: Optional[BaseStatus] = None
+            self._current_phase_name: str = ""
+            self._current_phase_start: float = 0.0
+            # durations of tasks in the previous repetitions of the current point, reported by worker threads
+            self._task_durations: Dict[Tuple[str, ...], Tuple[timedelta, int]] = {}
+            self._task_durations_lock: Lock = Lock()
+
+        def __getstate__(self) -> Dict[str, Any]:
+            # cached plans have not been started yet
+            state: Dict[str, Any] = dict(self.__dict__)
+            state.pop("_task_durations_lock")
+            state["_task_durations"] = {}
+            state["_current_phase_status"] = None
+            return state
+
+        def __setstate__(self, state: Dict[str, Any]) -> None:
+            self.__dict__.update(state)
+            self._task_durations_lock = Lock()
+
+        @property
+        def run_configurations(self) -> List[Dict[str, Any]]:
+            return list(self._properties)
 
         @property
         def run_configuration(self) -> Dict[str, Any]:
@@ -56,6 +95,46 @@ class Experiment(Configurable):
         def phases(self) -> List[str]:
             return list(self.run_configuration["phases"])
 
+        @property
+        def current_phase_name(self) -> str:
+            return self._current_phase_name
+
+        def sweep(self, run: int) -> Sweep:
+            return self._sweeps[run]
+
+        @property
+        def state(self) -> Dict[str, Any]:
+            return {"run": self._properties_index,
+                    "point": self._current_point,
+                    "repetition": self._current_repetition,
+                    "pipeline": list(self._current_pipeline)}
+
+        def restore(self, state: Dict[str, Any]) -> None:
+            self._properties_index = int(state["run"])
+            # journals written before sweeps were supported have no point
+            self._current_point = int(state["point"]) if "point" in state else 0
+            self._current_repetition = int(state["repetition"])
+            self._current_pipeline = list(state["pipeline"])
+            self._current_phase_status = None
+
+            logging.info(f"EXPERIMENT {self._experiment.name}: Resuming run {self._properties_index + 1} / {len(self._properties)}, "
+                         f"point {self._current_point + 1} / {len(self.sweep(self._properties_index))}, "
+                         f"repetition {self._current_repetition} / {self.repetitions}.")
+
+        def bind_parameters(self, run: int, point: int, repetition: int) -> None:
+            sweep: Sweep = self.sweep(run)
+            configuration: Dict[str, Any] = self._properties[run]
+
+            self._experiment.parameters.set_value("experiment-run", str(run + 1))
+            self._experiment.parameters.set_value("experiment-point", str(point + 1))
+            self._experiment.parameters.set_value("experiment-points", str(len(sweep)))
+            self._experiment.parameters.set_value("experiment-repetition", str(repetition))
+            self._experiment.parameters.set_value("experiment-repetitions",
+                                                  str(configuration["repeat"] if "repeat" in configuration else 1))
+
+            for name, value in sweep.point(point).items():
+                self._experiment.parameters.set_value(name, value)
+
         def run(self) -> BaseStatus:
             if not self._current_phase_is_done():
                 return NotDoneStatus()
@@ -65,26 +144,95 @@ class Experiment(Configurable):
 
             return DoneStatus()
 
+        def next_check(self) -> Optional[datetime]:
+            if self._current_phase_status is not None:
+                return self._current_phase_status.next_check()
+
+            if self._pause_until and datetime.now() < self._pause_until:
+                return self._pause_until
+
+            return datetime.min
+
+        def expected_duration(self, task: Tuple[str, ...]) -> Optional[timedelta]:
+            with self._task_durations_lock:
+                if task not in self._task_durations:
+                    return None
+
+                total_duration, repetitions = self._task_durations[task]
+                return total_duration / repetitions
+
+        def record_duration(self, task: Tuple[str, ...], duration: timedelta) -> None:
+            with self._task_durations_lock:
+                total_duration, repetitions = self._task_durations.get(task, (timedelta(), 0))
+                self._task_durations[task] = (total_duration + duration, repetitions + 1)
+
         def _current_phase_is_done(self) -> bool:
             if self._current_phase_status is None:
                 return True
 
-            return self._current_phase_status.is_done()
+            if not self._current_phase_status.is_done():
+                return False
 
-        def _try_start_next_phase(self) -> bool:
-            if len(self._current_pipeline) == 0:
-                self._current_repetition += 1
-                if self._current_repetition > self.repetitions:
+            self._current_phase_status = None
+            OutputCapture.close_phase(self._experiment.name, self._current_phase_name)
+            Metrics.record(Metrics.PHASE_DURATION,
+                           time.perf_counter() - self._current_phase_start,
+                           labels={"experiment": self._experiment.name, "phase": self._current_phase_name})
+
+            if self._experiment.journal is not None:
+                self._experiment.journal.record(self.state)
+
+            return True
+
+        @property
+        def remaining_phases(self) -> int:
+            # phases that are started after the current one
+            remaining_phases: int = len(self._current_pipeline)
+            for run in range(self._properties_index, len(self._properties)):
+                configuration: Dict[str, Any] = self._properties[run]
+                repetitions: int = configuration["repeat"] if "repeat" in configuration else 1
+                runs: int = len(self.sweep(run)) * repetitions
+                if run == self._properties_index:
+                    runs -= self._current_point * repetitions + self._current_repetition
+
+                remaining_phases += max(0, runs) * len(configuration["phases"])
+
+            return remaining_phases
+
+        def prepare(self) -> Optional[Phase]:
+            # moves on to the phase that is started first and binds its parameters, so that its commands can be
+            # resolved before the experiment starts
+            if len(self._current_pipeline) == 0 and not self._advance():
+                return None
+
+            self.bind_parameters(self._properties_index, self._current_point, self._current_repetition)
+            return self._experiment.phases[self._current_pipeline[0]]
+
+        def _advance(self) -> bool:
+            self._current_repetition += 1
+            if self._current_repetition > self.repetitions:
+                self._current_point += 1
+                if self._current_point >= len(self.sweep(self._properties_index)):
                     # go to the next pipeline
                     self._properties_index += 1
                     if self._properties_index >= len(self._properties):
-                        logging.info(f"EXPERIMENT {self._experiment.name}: Finished")
                         return False
 
-                    self._current_repetition = 1
-                    self._current_phase_status = None
+                    self._current_point = 0
+
+                self._current_repetition = 1
+                self._current_phase_status = None
+                # other points of a sweep may take a different time
+                with self._task_durations_lock:
+                    self._task_durations = {}
 
-                self._current_pipeline = [phase_name for phase_name in self.phases]
+            self._current_pipeline = [phase_name for phase_name in self.phases]
+            return True
+
+        def _try_start_next_phase(self) -> bool:
+            if len(self._current_pipeline) == 0 and not self._advance():
+                logging.info(f"EXPERIMENT {self._experiment.name}: Finished")
+                return False
 
             if self._pause_until and datetime.now() < self._pause_until:
                 if self._log_pause:
@@ -95,26 +243,84 @@ class Experiment(Configurable):
 
             next_phase: Phase = self._experiment.phases[self._current_pipeline.pop(0)]
 
-            self._experiment.parameters.set_value("experiment-repetition", str(self._current_repetition))
-            self._experiment.parameters.set_value("experiment-repetitions", str(self.repetitions))
+            self.bind_parameters(self._properties_index, self._current_point, self._current_repetition)
 
-            logging.info(f"EXPERIMENT {self._experiment.name} ({self._current_repetition} / {self.repetitions}): {next_phase.name}")
+            points: int = len(self.sweep(self._properties_index))
+            logging.info(f"EXPERIMENT {self._experiment.name} "
+                         + (f"(point {self._current_point + 1} / {points}, " if points > 1 else "(")
+                         + f"{self._current_repetition} / {self.repetitions}): {next_phase.name}")
+            self._current_phase_name = next_phase.name
+            self._current_phase_start = time.perf_counter()
             self._current_phase_status = next_phase.run()
             return True
 
-    def __init__(self, experiment_file: Path):
-        with experiment_file.open("r") as input_file:
-            super().__init__(json.load(input_file))
+    @staticmethod
+    def load(experiment_file: Path, archive: Optional[ZipFile] = None) -> "Experiment":
+        with (archive.open(experiment_file.as_posix()) if archive else experiment_file.open("rb")) as input_file:
+            content: bytes = input_file.read()
+
+        # experiments that are deployed again are not parsed and validated again
+        key: str = PlanCache.key(content)
+        experiment: Optional[Experiment] = PlanCache.load(key)
+        if experiment is not None:
+            experiment._archive = archive
+            return experiment
+
+        experiment = Experiment(json.loads(content.decode("utf-8")), archive)
+        PlanCache.store(key, experiment)
+        return experiment
+
+    def __init__(self, properties: Dict[str, Any], archive: Optional[ZipFile] = None):
+        # experiments deployed as ZIP keep their archive, so that tasks can stream payloads directly out of it
+        self._archive: Optional[ZipFile] = archive
+        self._journal: Optional[Journal] = None
+
+        super().__init__(properties)
 
+        self._initialize_connections()
+
+    def _initialize_connections(self) -> None:
         self._ssh_connections: Dict[str, SSHCommandExecutor] = {}
+        self._async_ssh_connections: Dict[str, AsyncSSHCommandExecutor] = {}
+        self._ssh_connections_lock: Lock = Lock()
+        self._local_command_executor: LocalCommandExecutor = LocalCommandExecutor()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # only the plan is cached, the archive, the journal and the connections belong to a single deployment
+        state: Dict[str, Any] = super().__getstate__()
+        for name in ("_archive", "_journal", "_ssh_connections", "_async_ssh_connections", "_ssh_connections_lock",
+                     "_local_command_executor"):
+            state.pop(name, None)
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._archive = None
+        self._journal = None
+        self._initialize_connections()
 
     def _initialize_cache(self):
         self._fill_cache("name")
         self._fill_cache("hosts", lambda value: list(value))
+        self._fill_cache("max-parallel-hosts", int, 1)
+        self._fill_cache("ssh-backend", lambda value: str(value).lower(), "pxssh")
+        self._fill_cache("priority", int, 0)
+        self._fill_cache("deadline", to_datetime)
+        self._fill_cache("expected-duration", to_timespan, timedelta())
         self._fill_cache("parameters", lambda value: Parameters(self, value))
+        # plugins register additional task types, so they have to be loaded before the phases
+        self._fill_cache("plugins", Experiment._load_plugins, [])
         self._fill_cache("phases", lambda value: {config["name"]: Phase(self, config) for config in value})
         self._fill_cache("run", lambda value: Experiment.Runner(self, value))
 
+    @staticmethod
+    def _load_plugins(modules: List[str]) -> List[str]:
+        for module in modules:
+            importlib.import_module(module)
+
+        return list(modules)
+
     @property
     def name(self) -> str:
         return self._cached_property_value("name")
@@ -123,6 +329,26 @@ class Experiment(Configurable):
     def hosts(self) -> List[str]:
         return self._cached_property_value("hosts")
 
+    @property
+    def max_parallel_hosts(self) -> int:
+        return self._cached_property_value("max-parallel-hosts")
+
+    @property
+    def ssh_backend(self) -> str:
+        return self._cached_property_value("ssh-backend")
+
+    @property
+    def priority(self) -> int:
+        return self._cached_property_value("priority")
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        return self._cached_property_value("deadline")
+
+    @property
+    def expected_duration(self) -> timedelta:
+        return self._cached_property_value("expected-duration")
+
     @property
     def parameters(self) -> Parameters:
         return self._cached_property_value("parameters")
@@ -131,6 +357,18 @@ class Experiment(Configurable):
     def phases(self) -> Dict[str, Phase]:
         return self._cached_property_value("phases")
 
+    @property
+    def archive(self) -> Optional[ZipFile]:
+        return self._archive
+
+    @property
+    def journal(self) -> Optional[Journal]:
+        return self._journal
+
+    @journal.setter
+    def journal(self, journal: Optional[Journal]) -> None:
+        self._journal = journal
+
     @property
     def runner(self) -> "Experiment.Runner":
         return self._cached_property_value("run")
@@ -142,16 +380,72 @@ class Experiment(Configurable):
         #     return DummyCommandExecutor(task.use_ssh, self.parameters.value(host, "ssh-user"), host)
 
         if not task.use_ssh:
-            return LocalCommandExecutor()
-
-        if host not in self._ssh_connections:
-            self._ssh_connections[host] = SSHCommandExecutor(host, self.parameters.value(host, "ssh-user"))
-
-        return self._ssh_connections[host]
+            return self._local_command_executor
+
+        if self.ssh_backend == "async":
+            return self._get_async_ssh_connection(host)
+
+        with self._ssh_connections_lock:
+            if host in self._ssh_connections:
+                return self._ssh_connections[host]
+
+        # tasks of the same host are never dispatched concurrently, so we can log in without holding the lock
+        ssh_connection: SSHCommandExecutor = SSHConnectionPool.shared().acquire(host, self.parameters.value(host, "ssh-user"))
+        with self._ssh_connections_lock:
+            self._ssh_connections[host] = ssh_connection
+
+        return ssh_connection
+
+    def _get_async_ssh_connection(self, host: str) -> AsyncSSHCommandExecutor:
+        with self._ssh_connections_lock:
+            if host not in self._async_ssh_connections:
+                port: Optional[int] = int(self.parameters.value(host, "ssh-port")) if self.parameters.has_value(host, "ssh-port") else None
+                self._async_ssh_connections[host] = AsyncSSHCommandExecutor(host,
+                                                                            self.parameters.value(host, "ssh-user"),
+                                                                            port)
+
+            return self._async_ssh_connections[host]
+
+    def prepare(self, busy_hosts: Set[str]) -> None:
+        phase: Optional[Phase] = self.runner.prepare()
+        if phase is None:
+            return
+
+        # connections to hosts that are still busy are handed over by the previous experiment
+        tasks_by_host: Dict[str, List[BaseTask]] = phase.tasks_by_host()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_parallel_hosts, len(tasks_by_host)))) as executor:
+            for host, tasks in tasks_by_host.items():
+                executor.submit(self._prepare_host, host, tasks, host not in busy_hosts)
+
+    def _prepare_host(self, host: str, tasks: List[BaseTask], connect: bool) -> None:
+        try:
+            for task in tasks:
+                # resolving the commands compiles and caches the parameterized strings of the tasks
+                task.commands(self)
+
+            ssh_tasks: List[BaseTask] = [task for task in tasks if task.use_ssh]
+            if connect and len(ssh_tasks) > 0:
+                self.get_command_executor(ssh_tasks[0]).execute("true")
+        except BaseException as exception:
+            # preparing is best effort, the phase reports the error once it runs
+            logging.debug(f"EXPERIMENT {self.name}: Unable to prepare {host}: {exception}")
 
     def run(self) -> BaseStatus:
         return self.runner.run()
 
+    def next_check(self) -> Optional[datetime]:
+        return self.runner.next_check()
+
     def tear_down(self) -> None:
-        for host in self._ssh_connections:
-            self._ssh_connections[host].close()
+        with self._ssh_connections_lock:
+            ssh_connections: Dict[str, SSHCommandExecutor] = self._ssh_connections
+            self._ssh_connections = {}
+
+        # agents of the hosts are stopped before their connections are handed over to the next experiment
+        for cmd in [*ssh_connections.values(), *self._async_ssh_connections.values(), self._local_command_executor]:
+            RemoteAgent.close(cmd)
+
+        for host in ssh_connections:
+            SSHConnectionPool.shared().release(ssh_connections[host])
+
+        OutputCapture.close(self.name)
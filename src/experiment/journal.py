@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Any, Optional, List, IO
+
+
+class Journal:
+
+    _tail_block_size: int = 4096
+    _create_lock: Lock = Lock()
+
+    @staticmethod
+    def create(directory: Path, name: str, definition: Dict[str, Any]) -> "Journal":
+        safe_name: str = "".join(character if character.isalnum() or character in "-_" else "_" for character in name)
+
+        # deployments are prepared concurrently, experiments of the same name must not share a journal
+        with Journal._create_lock:
+            journal_file: Path = directory / f"{datetime.now():%Y%m%d%H%M%S%f}-{safe_name}.journal"
+            while journal_file.exists():
+                journal_file = directory / f"{datetime.now():%Y%m%d%H%M%S%f}-{safe_name}.journal"
+
+            journal: Journal = Journal(journal_file, definition)
+            journal._append(definition)
+
+        Journal.sync_directory(directory)
+
+        return journal
+
+    @staticmethod
+    def load_all(directory: Path) -> List["Journal"]:
+        journals: List[Journal] = []
+
+        # file names start with the time of creation, so sorting them restores the order of the queue
+        for journal_file in sorted(directory.glob("*.journal")):
+            try:
+                with journal_file.open("r") as input_file:
+                    definition: Dict[str, Any] = json.loads(input_file.readline())
+
+                journals.append(Journal(journal_file, definition))
+            except BaseException as exception:
+                logging.error(f"Unable to read journal \"{journal_file.absolute()}\": {exception}")
+
+        return journals
+
+    @staticmethod
+    def sync_directory(directory: Path) -> None:
+        descriptor: int = os.open(str(directory.absolute()), os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def __init__(self, journal_file: Path, definition: Dict[str, Any]):
+        self._journal_file: Path = journal_file
+        self._definition: Dict[str, Any] = definition
+        self._output_file: Optional[IO[str]] = None
+
+    @property
+    def definition(self) -> Dict[str, Any]:
+        return self._definition
+
+    def record(self, state: Dict[str, Any]) -> None:
+        self._append(state)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        if self._output_file is None:
+            self._output_file = self._journal_file.open("a")
+            if self._output_file.tell() > 0 and not self._ends_with_new_line():
+                # terminate an entry that was torn by a crash
+                self._output_file.write("\n")
+
+        self._output_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._output_file.flush()
+        os.fsync(self._output_file.fileno())
+
+    def _ends_with_new_line(self) -> bool:
+        with self._journal_file.open("rb") as input_file:
+            input_file.seek(-1, os.SEEK_END)
+            return input_file.read(1) == b"\n"
+
+    def last_state(self) -> Optional[Dict[str, Any]]:
+        # every entry holds the complete progress, so only the tail of the journal needs to be read
+        with self._journal_file.open("rb") as input_file:
+            input_file.seek(0, os.SEEK_END)
+            file_size: int = input_file.tell()
+            block_size: int = Journal._tail_block_size
+
+            while True:
+                input_file.seek(max(0, file_size - block_size))
+                lines: List[bytes] = input_file.read().split(b"\n")
+                is_complete: bool = block_size >= file_size
+                if not is_complete:
+                    # the first line might only be partially contained in the block
+                    lines = lines[1:]
+
+                # skip the definition and a possibly torn last entry
+                for index in range(len(lines) - 1, 0 if is_complete else -1, -1):
+                    try:
+                        return json.loads(lines[index].decode("utf-8"))
+                    except ValueError:
+                        continue
+
+                if is_complete:
+                    return None
+
+                block_size *= 2
+
+    def close(self) -> None:
+        if self._output_file is not None:
+            self._output_file.close()
+            self._output_file = None
+
+    def delete(self) -> None:
+        self.close()
+        if self._journal_file.exists():
+            os.remove(str(self._journal_file.absolute()))
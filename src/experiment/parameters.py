@@ -1,22 +1,74 @@
 import re
-from typing import Dict, Any, List, Tuple, Optional, Union
+from threading import Lock
+from typing import Dict, Any, List, Tuple, Optional, Union, Callable, Set, FrozenSet, Pattern
 
 from src.utility import assert_is_experiment
 
 
 class Parameters:
+    class Template:
+
+        _parameter_regex: Pattern[str] = re.compile(r"{{(?P<Name>[\w-]+?)}}")
+
+        @staticmethod
+        def compile(parameterized_string: str) -> "Parameters.Template":
+            # literals are stored at even, parameter names at odd indices
+            segments: List[str] = []
+            position: int = 0
+            for match in Parameters.Template._parameter_regex.finditer(parameterized_string):
+                segments.append(parameterized_string[position:match.start()])
+                segments.append(match.group("Name"))
+                position = match.end()
+
+            segments.append(parameterized_string[position:])
+            return Parameters.Template(tuple(segments))
+
+        def __init__(self, segments: Tuple[str, ...]):
+            self._segments: Tuple[str, ...] = segments
+            self._references: FrozenSet[str] = frozenset(segments[1::2])
+
+        @property
+        def references(self) -> FrozenSet[str]:
+            return self._references
+
+        def render(self, value_of: Callable[[str], str]) -> str:
+            if len(self._segments) == 1:
+                return self._segments[0]
+
+            parts: List[str] = list(self._segments)
+            for index in range(1, len(parts), 2):
+                parts[index] = value_of(parts[index])
+
+            return "".join(parts)
 
     def __init__(self, experiment: Any, properties: Dict[str, Any]):
         from src.experiment.experiment import Experiment
         self._experiment: Experiment = assert_is_experiment(experiment)
 
-        self._parameter_regex: re = re.compile(r"(?P<Frame>{{(?P<Name>[\w-]+?)}})")
         self._properties: Dict[str, Any] = properties
         self._common_parameters: Dict[str, str] = {}
         self._specific_parameters: Dict[str, Dict[str, str]] = {}
 
+        self._templates: Dict[str, Parameters.Template] = {}
+        self._resolved_strings: Dict[str, Dict[str, str]] = {}
+        self._resolved_strings_by_reference: Dict[str, Set[Tuple[str, str]]] = {}
+        # tasks of different hosts resolve their strings concurrently
+        self._resolved_strings_lock: Lock = Lock()
+
         self._initialize_parameters()
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # resolved strings depend on the values that are bound while the experiment runs, templates do not
+        state: Dict[str, Any] = dict(self.__dict__)
+        state["_resolved_strings"] = {}
+        state["_resolved_strings_by_reference"] = {}
+        state.pop("_resolved_strings_lock")
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._resolved_strings_lock = Lock()
+
     def _initialize_parameters(self) -> None:
         self._common_parameters["experiment-name"] = self._experiment.name
 
@@ -27,32 +79,16 @@ class Parameters:
         if "common" not in self._properties:
             return
 
-        unresolved_parameters: Dict[str, Any] = self._properties["common"]
-        while len(unresolved_parameters) > 0:
-            new_unresolved_parameters: Dict[str, Any] = {}
-
-            for parameter_name in unresolved_parameters:
-                parameter_value: str = str(unresolved_parameters[parameter_name])
-                matches: List[Tuple[str, str]] = self._parameter_regex.findall(parameter_value)
-                is_resolved: bool = True
+        unresolved_parameters: Dict[str, Parameters.Template] = {name: self._template(str(value))
+                                                                 for name, value in self._properties["common"].items()}
 
-                for block, name in matches:
-                    if name not in self._common_parameters:
-                        is_resolved = False
-                        break
+        for parameter_name in Parameters._resolution_order(unresolved_parameters, "common parameters", False):
+            template: Parameters.Template = unresolved_parameters[parameter_name]
+            for name in template.references:
+                if name not in self._common_parameters:
+                    raise Exception(f"Common parameter \"{parameter_name}\" references unknown parameter \"{name}\"!")
 
-                    parameter_value = parameter_value.replace(block, self._common_parameters[name])
-
-                if not is_resolved:
-                    new_unresolved_parameters[parameter_name] = unresolved_parameters[parameter_name]
-                    continue
-
-                self._common_parameters[parameter_name] = parameter_value
-
-            if len(new_unresolved_parameters) == len(unresolved_parameters):
-                raise Exception("Cyclic dependency in common parameters detected!")
-
-            unresolved_parameters = new_unresolved_parameters
+            self._common_parameters[parameter_name] = template.render(self._common_parameters.__getitem__)
 
     def _initialize_specific_parameters(self) -> None:
         if "specific" not in self._properties:
@@ -91,48 +127,86 @@ class Parameters:
         return unresolved_parameters
 
     def _resolve_specific_parameters(self, host: str, unresolved_parameters: Dict[str, str]) -> None:
+        templates: Dict[str, Parameters.Template] = {name: self._template(value)
+                                                     for name, value in unresolved_parameters.items()}
+        specific_parameters: Dict[str, str] = self._specific_parameters[host]
+
+        for parameter_name in Parameters._resolution_order(templates, f"specific parameters of host \"{host}\"", True):
 
-        while len(unresolved_parameters) > 0:
-            new_unresolved_parameters: Dict[str, str] = {}
+            def value_of(name: str) -> str:
+                if name == "host":
+                    return host
 
-            for parameter_name in unresolved_parameters:
-                parameter_value: str = str(unresolved_parameters[parameter_name])
-                matches: List[Tuple[str, str]] = self._parameter_regex.findall(parameter_value)
-                is_resolved: bool = True
+                # a specific parameter referencing itself extends the common value of the same name
+                if name in specific_parameters and name != parameter_name:
+                    return specific_parameters[name]
 
-                for block, name in matches:
-                    sub_value: Optional[str] = None
-                    if name == "host":
-                        sub_value = host
-                    elif name in self._specific_parameters[host]:
-                        sub_value = self._specific_parameters[host][name]
-                    elif name in self._common_parameters:
-                        sub_value = self._common_parameters[name]
+                if name in self._common_parameters:
+                    return self._common_parameters[name]
 
-                    if sub_value is None:
-                        is_resolved = False
-                        break
+                raise Exception(f"Specific parameter \"{parameter_name}\" of host \"{host}\" references unknown parameter \"{name}\"!")
 
-                    parameter_value = parameter_value.replace(block, sub_value)
+            specific_parameters[parameter_name] = templates[parameter_name].render(value_of)
 
-                if not is_resolved:
-                    new_unresolved_parameters[parameter_name] = unresolved_parameters[parameter_name]
+    @staticmethod
+    def _resolution_order(templates: Dict[str, "Parameters.Template"],
+                          scope: str,
+                          ignore_self_references: bool) -> List[str]:
+        order: List[str] = []
+        visited: Set[str] = set()
+
+        for root in templates:
+            if root in visited:
+                continue
+
+            # iterative depth-first search, `path` holds the chain of parameters that is currently being resolved
+            path: List[str] = [root]
+            on_path: Set[str] = {root}
+            pending_references: List[List[str]] = [Parameters._dependencies(root, templates, ignore_self_references)]
+            visited.add(root)
+
+            while len(path) > 0:
+                if len(pending_references[-1]) == 0:
+                    on_path.remove(path[-1])
+                    order.append(path.pop())
+                    pending_references.pop()
                     continue
 
-                self._specific_parameters[host][parameter_name] = parameter_value
+                name: str = pending_references[-1].pop()
+                if name in on_path:
+                    cycle: List[str] = path[path.index(name):] + [name]
+                    raise Exception(f"Cyclic dependency in {scope} detected: {' -> '.join(cycle)}!")
+
+                if name in visited:
+                    continue
 
-            if len(new_unresolved_parameters) == len(unresolved_parameters):
-                raise Exception("Cyclic dependency in common parameters detected!")
+                visited.add(name)
+                path.append(name)
+                on_path.add(name)
+                pending_references.append(Parameters._dependencies(name, templates, ignore_self_references))
 
-            unresolved_parameters = new_unresolved_parameters
+        return order
+
+    @staticmethod
+    def _dependencies(parameter_name: str,
+                      templates: Dict[str, "Parameters.Template"],
+                      ignore_self_references: bool) -> List[str]:
+        return sorted(name for name in templates[parameter_name].references
+                      if name in templates and (name != parameter_name or not ignore_self_references))
 
     def value(self, host: str, parameter_name: str) -> str:
         parameter_value: Optional[str] = self._try_get_specific_value(host, parameter_name)
         if parameter_value is not None:
             return parameter_value
 
+        if parameter_name not in self._common_parameters:
+            raise Exception(f"Unknown parameter \"{parameter_name}\"!")
+
         return self._common_parameters[parameter_name]
 
+    def has_value(self, host: str, parameter_name: str) -> bool:
+        return self._try_get_specific_value(host, parameter_name) is not None or parameter_name in self._common_parameters
+
     def set_value(self, parameter_name: str, parameter_value: str, host: Optional[str] = None) -> None:
         parameters: Dict[str, str] = self._common_parameters
         if host is not None:
@@ -141,7 +215,11 @@ class Parameters:
 
             parameters = self._specific_parameters[host]
 
+        if parameters.get(parameter_name) == parameter_value:
+            return
+
         parameters[parameter_name] = parameter_value
+        self._invalidate_resolved_strings(parameter_name, host)
 
     def unset_parameter(self, parameter_name: str, host: Optional[str] = None) -> None:
         parameters: Dict[str, str] = self._common_parameters
@@ -152,6 +230,7 @@ class Parameters:
             parameters = self._specific_parameters[host]
 
         parameters.pop(parameter_name)
+        self._invalidate_resolved_strings(parameter_name, host)
 
     def _try_get_specific_value(self, host: str, parameter_name: str) -> Optional[str]:
         if parameter_name == "host":
@@ -175,13 +254,39 @@ class Parameters:
         raise Exception(f"Unexpected argument type!")
 
     def _resolve_string(self, host: str, parameterized_string: str) -> str:
-        matches: List[Tuple[str, str]] = self._parameter_regex.findall(parameterized_string)
-        return_value: str = parameterized_string
+        # a reference that is lost to a concurrent resolve would keep its string from being invalidated
+        with self._resolved_strings_lock:
+            resolved_strings: Dict[str, str] = self._resolved_strings.setdefault(host, {})
+            if parameterized_string in resolved_strings:
+                return resolved_strings[parameterized_string]
 
-        for block, name in matches:
-            return_value = return_value.replace(block, self.value(host, name))
+            template: Parameters.Template = self._template(parameterized_string)
+            return_value: str = template.render(lambda name: self.value(host, name))
 
-        return return_value
+            resolved_strings[parameterized_string] = return_value
+            for name in template.references:
+                self._resolved_strings_by_reference.setdefault(name, set()).add((host, parameterized_string))
+
+            return return_value
 
     def _resolve_list_of_string(self, host: str, parameterized_string: List[str]) -> List[str]:
         return [self._resolve_string(host, s) for s in parameterized_string]
+
+    def _template(self, parameterized_string: str) -> "Parameters.Template":
+        if parameterized_string not in self._templates:
+            self._templates[parameterized_string] = Parameters.Template.compile(parameterized_string)
+
+        return self._templates[parameterized_string]
+
+    def _invalidate_resolved_strings(self, parameter_name: str, host: Optional[str]) -> None:
+        with self._resolved_strings_lock:
+            if parameter_name not in self._resolved_strings_by_reference:
+                return
+
+            cache_keys: Set[Tuple[str, str]] = self._resolved_strings_by_reference[parameter_name]
+            invalidated_keys: Set[Tuple[str, str]] = {key for key in cache_keys if host is None or key[0] == host}
+
+            for cached_host, parameterized_string in invalidated_keys:
+                self._resolved_strings[cached_host].pop(parameterized_string, None)
+
+            cache_keys.difference_update(invalidated_keys)
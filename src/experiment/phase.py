@@ -1,20 +1,30 @@
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Optional
 
 from src.experiment.configurable import Configurable
 from src.experiment.status.await_all_status import AwaitAllStatus
 from src.experiment.status.base_status import BaseStatus
+from src.experiment.status.measured_status import MeasuredStatus
+from src.experiment.status.sequence_status import SequenceStatus
 from src.experiment.task.base_task import BaseTask
+from src.metrics import Metrics
 from src.utility import assert_is_experiment
 
 
 class Phase(Configurable):
+
+    __slots__ = ("_experiment", "_common_tasks", "_specific_tasks")
+    _is_shareable: bool = True
+
     def __init__(self, experiment: Any, properties: Dict[str, Any]):
         from src.experiment.experiment import Experiment
         self._experiment: Experiment = assert_is_experiment(experiment)
 
         super().__init__(properties)
 
-        self._common_tasks: Dict[str, List[BaseTask]] = {}
+        # task definitions are shared by all of their hosts, the per-host views are created when the phase runs
+        self._common_tasks: List[BaseTask] = []
         self._specific_tasks: Dict[str, List[BaseTask]] = {}
 
         self._initialize_tasks()
@@ -22,6 +32,7 @@ class Phase(Configurable):
     def _initialize_cache(self):
         self._fill_cache("name")
         self._fill_cache("do")
+        self._fill_cache("max-parallel-hosts", int)
 
     @property
     def name(self) -> str:
@@ -31,6 +42,14 @@ class Phase(Configurable):
     def do(self) -> Dict[str, Any]:
         return self._cached_property_value("do")
 
+    @property
+    def max_parallel_hosts(self) -> int:
+        max_parallel_hosts: Optional[int] = self._cached_property_value("max-parallel-hosts")
+        if max_parallel_hosts is None:
+            return self._experiment.max_parallel_hosts
+
+        return max_parallel_hosts
+
     def _initialize_tasks(self) -> None:
         self._initialize_common_tasks()
         self._initialize_specific_tasks()
@@ -40,8 +59,7 @@ class Phase(Configurable):
         if "common" in self.do:
             tasks = self.do["common"]
 
-        for host in self._experiment.hosts:
-            self._common_tasks[host] = self._create_tasks(host, tasks)
+        self._common_tasks = self._create_tasks(tasks)
 
     def _initialize_specific_tasks(self) -> None:
         tasks: List[Dict[str, Any]] = []
@@ -52,17 +70,18 @@ class Phase(Configurable):
             if "hosts" not in properties:
                 continue
 
+            definitions: List[BaseTask] = self._create_tasks([properties])
             for host in properties["hosts"]:
                 if host not in self._specific_tasks:
                     self._specific_tasks[host] = []
 
-                self._specific_tasks[host] += self._create_tasks(host, [properties])
+                self._specific_tasks[host] += definitions
 
     @staticmethod
-    def _create_tasks(host: str, task_properties: List[Dict[str, Any]]) -> List[BaseTask]:
+    def _create_tasks(task_properties: List[Dict[str, Any]]) -> List[BaseTask]:
         tasks: List[BaseTask] = []
         for properties in task_properties:
-            task: BaseTask = BaseTask.try_create(host, properties)
+            task: BaseTask = BaseTask.try_create(properties)
             if not task:
                 continue
 
@@ -71,16 +90,65 @@ class Phase(Configurable):
         return tasks
 
     def run(self) -> BaseStatus:
-        status: List[BaseStatus] = self._run_tasks(self._common_tasks) + self._run_tasks(self._specific_tasks)
-        return AwaitAllStatus(status)
+        with Metrics.timer(Metrics.PHASE_DISPATCH, experiment=self._experiment.name, phase=self.name):
+            if self.max_parallel_hosts > 1:
+                return AwaitAllStatus(self._run_tasks_in_parallel())
+
+            # common and specific tasks of a host form one sequence, so that blocking tasks hold back the rest
+            status: List[BaseStatus] = []
+            for tasks in self.tasks_by_host().values():
+                status += self._run_host_tasks(tasks)
+
+            return AwaitAllStatus(status)
+
+    def _run_tasks_in_parallel(self) -> List[BaseStatus]:
+        tasks_by_host: Dict[str, List[BaseTask]] = self.tasks_by_host()
+        if len(tasks_by_host) == 0:
+            return []
 
-    def _run_tasks(self, tasks: Dict[str, List[BaseTask]]) -> List[BaseStatus]:
         status: List[BaseStatus] = []
-        for host in tasks:
-            if host not in self._experiment.hosts:
-                continue
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel_hosts, len(tasks_by_host))) as executor:
+            futures: List[Future] = [executor.submit(self._run_host_tasks, tasks) for tasks in tasks_by_host.values()]
+            for future in futures:
+                status += future.result()
+
+        return status
 
-            for task in tasks[host]:
-                status.append(task.execute(self._experiment))
+    def tasks_by_host(self) -> Dict[str, List[BaseTask]]:
+        tasks_by_host: Dict[str, List[BaseTask]] = {host: Phase._materialize(self._common_tasks, host)
+                                                    for host in self._experiment.hosts}
+
+        for host in self._specific_tasks:
+            if host in self._experiment.hosts:
+                tasks_by_host[host] += Phase._materialize(self._specific_tasks[host], host)
+
+        return tasks_by_host
+
+    @staticmethod
+    def _materialize(definitions: List[BaseTask], host: str) -> List[BaseTask]:
+        return [definition.for_host(host) for definition in definitions]
+
+    def _run_host_tasks(self, tasks: List[BaseTask]) -> List[BaseStatus]:
+        status: List[BaseStatus] = []
+        for index, task in enumerate(tasks):
+            task_status: BaseStatus = self._execute_task(task)
+            if task_status.blocks_host() and index + 1 < len(tasks) and not task_status.is_done():
+                # the remaining tasks of this host are executed as soon as the running one is done
+                status.append(SequenceStatus(task_status, lambda: self._run_host_tasks(tasks[index + 1:])))
+                break
+
+            status.append(task_status)
 
         return status
+
+    def _execute_task(self, task: BaseTask) -> BaseStatus:
+        if not Metrics.is_enabled():
+            return task.execute(self._experiment)
+
+        # tasks might be executed by worker threads, so the labels are set for each task
+        with Metrics.labels(experiment=self._experiment.name, phase=self.name, task=task.type(), host=task.host):
+            start: float = time.perf_counter()
+            with Metrics.timer(Metrics.TASK_EXECUTE):
+                task_status: BaseStatus = task.execute(self._experiment)
+
+            return MeasuredStatus(task_status, Metrics.TASK_DURATION, start)
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Any, List, Tuple
+
+
+class PlanCache:
+    # has to be increased whenever the pickled objects change in a way that the source fingerprint does not reflect
+    FORMAT_VERSION: int = 1
+
+    _directory: Path = Path("./.cache/plans/")
+    _max_bytes: int = 64 * 1024 * 1024
+    _source_fingerprint: Optional[bytes] = None
+    # experiments are loaded by the workers of the directory watcher
+    _lock: Lock = Lock()
+
+    @staticmethod
+    def configure(directory: Path, max_bytes: int) -> None:
+        PlanCache._directory = directory
+        PlanCache._max_bytes = max_bytes
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return PlanCache._max_bytes > 0
+
+    @staticmethod
+    def key(content: bytes) -> str:
+        digest: Any = hashlib.sha256(content)
+        digest.update(str(PlanCache.FORMAT_VERSION).encode("utf-8"))
+        digest.update(PlanCache._fingerprint())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _fingerprint() -> bytes:
+        # any change to the sources of night-shift invalidates all plans, as the pickled classes might have changed
+        with PlanCache._lock:
+            if PlanCache._source_fingerprint is None:
+                digest: Any = hashlib.sha256()
+                root: Path = Path(__file__).parent.parent
+                for source_file in sorted(root.rglob("*.py")):
+                    digest.update(source_file.relative_to(root).as_posix().encode("utf-8"))
+                    digest.update(source_file.read_bytes())
+
+                PlanCache._source_fingerprint = digest.digest()
+
+            return PlanCache._source_fingerprint
+
+    @staticmethod
+    def load(key: str) -> Optional[Any]:
+        if not PlanCache.is_enabled():
+            return None
+
+        plan_file: Path = PlanCache._directory / f"{key}.plan"
+        try:
+            with plan_file.open("rb") as input_file:
+                plan: Any = pickle.load(input_file)
+        except FileNotFoundError:
+            return None
+        except BaseException as exception:
+            logging.warning(f"Unable to load cached plan \"{plan_file}\": {exception}")
+            PlanCache._remove(plan_file)
+            return None
+
+        # the time of modification orders the plans by their last use
+        try:
+            os.utime(str(plan_file))
+        except FileNotFoundError:
+            pass
+
+        return plan
+
+    @staticmethod
+    def store(key: str, plan: Any) -> None:
+        if not PlanCache.is_enabled():
+            return
+
+        plan_file: Path = PlanCache._directory / f"{key}.plan"
+        temporary_file: Path = PlanCache._directory / f"{key}.{os.getpid()}.{id(plan)}.tmp"
+        try:
+            PlanCache._directory.mkdir(parents=True, exist_ok=True)
+            with temporary_file.open("wb") as output_file:
+                pickle.dump(plan, output_file, pickle.HIGHEST_PROTOCOL)
+
+            # readers must never see a partially written plan
+            os.replace(str(temporary_file), str(plan_file))
+        except BaseException as exception:
+            logging.warning(f"Unable to cache plan \"{plan_file}\": {exception}")
+            PlanCache._remove(temporary_file)
+            return
+
+        PlanCache._evict()
+
+    @staticmethod
+    def _evict() -> None:
+        # least recently used plans are removed until the cache fits into its size again
+        with PlanCache._lock:
+            plans: List[Tuple[int, int, Path]] = []
+            for plan_file in PlanCache._directory.glob("*.plan"):
+                try:
+                    stat: os.stat_result = plan_file.stat()
+                    plans.append((stat.st_mtime_ns, stat.st_size, plan_file))
+                except FileNotFoundError:
+                    continue
+
+            total_size: int = sum(size for _, size, _ in plans)
+            for _, size, plan_file in sorted(plans):
+                if total_size <= PlanCache._max_bytes:
+                    return
+
+                PlanCache._remove(plan_file)
+                total_size -= size
+
+    @staticmethod
+    def _remove(plan_file: Path) -> None:
+        try:
+            os.remove(str(plan_file))
+        except FileNotFoundError:
+            pass
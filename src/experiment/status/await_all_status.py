@@ -1,18 +1,34 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from src.experiment.status.base_status import BaseStatus
 
 
 class AwaitAllStatus(BaseStatus):
 
+    __slots__ = ("_status",)
+
     def __init__(self, status: List[BaseStatus]):
         self._status: List[BaseStatus] = status
 
     def is_done(self) -> bool:
+        now: datetime = datetime.now()
         new_status: List[BaseStatus] = []
         for status in self._status:
-            if not status.is_done():
+            next_check: Optional[datetime] = status.next_check()
+            if next_check is None or next_check > now or not status.is_done():
                 new_status.append(status)
 
         self._status = new_status
         return len(self._status) == 0
+
+    def next_check(self) -> Optional[datetime]:
+        if len(self._status) == 0:
+            return datetime.min
+
+        next_checks: List[datetime] = [next_check for next_check in (status.next_check() for status in self._status)
+                                       if next_check is not None]
+        if len(next_checks) == 0:
+            return None
+
+        return min(next_checks)
@@ -1,8 +1,37 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Callable
 
 
 class BaseStatus(ABC):
 
+    __slots__ = ()
+
+    _change_listener: Optional[Callable[[], None]] = None
+
+    @staticmethod
+    def set_change_listener(listener: Optional[Callable[[], None]]) -> None:
+        BaseStatus._change_listener = listener
+
+    @staticmethod
+    def notify_change() -> None:
+        # called by statuses that are completed by background threads, so that the scheduler wakes up right away
+        if BaseStatus._change_listener is not None:
+            BaseStatus._change_listener()
+
     @abstractmethod
     def is_done(self) -> bool:
         raise NotImplementedError
+
+    def failed(self) -> bool:
+        # only meaningful once the status is done
+        return False
+
+    def blocks_host(self) -> bool:
+        # whether subsequent tasks of the same host must wait until this status is done
+        return False
+
+    def next_check(self) -> Optional[datetime]:
+        # earliest point in time at which `is_done` might return a different result,
+        # `None` if the status does not change on its own
+        return datetime.min
@@ -0,0 +1,44 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from src.command.command_process import CommandProcess
+from src.experiment.status.base_status import BaseStatus
+
+
+class CommandStatus(BaseStatus):
+
+    __slots__ = ("_process", "_description", "_is_done")
+
+    def __init__(self, process: CommandProcess, description: str):
+        self._process: CommandProcess = process
+        self._description: str = description
+        self._is_done: bool = False
+
+    @property
+    def exit_code(self) -> Optional[int]:
+        return self._process.exit_code
+
+    def is_done(self) -> bool:
+        if self._is_done or not self._process.poll():
+            return self._is_done
+
+        self._is_done = True
+        if self._process.timed_out:
+            logging.error(f"{self._description}: Timed out.")
+        elif self._process.exit_code:
+            logging.error(f"{self._description}: Failed with exit code {self._process.exit_code}.")
+
+        return True
+
+    def failed(self) -> bool:
+        return self._process.timed_out or bool(self._process.exit_code)
+
+    def blocks_host(self) -> bool:
+        return True
+
+    def next_check(self) -> Optional[datetime]:
+        if self._is_done or self._process.is_finished:
+            return datetime.min
+
+        return self._process.deadline
@@ -3,5 +3,7 @@ from src.experiment.status.base_status import BaseStatus
 
 class DoneStatus(BaseStatus):
 
+    __slots__ = ()
+
     def is_done(self) -> bool:
         return True
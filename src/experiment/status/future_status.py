@@ -0,0 +1,32 @@
+import logging
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Optional
+
+from src.experiment.status.base_status import BaseStatus
+
+
+class FutureStatus(BaseStatus):
+
+    __slots__ = ("_future", "_description")
+
+    def __init__(self, future: Future, description: str):
+        self._future: Future = future
+        self._description: str = description
+        self._future.add_done_callback(lambda _: BaseStatus.notify_change())
+
+    def is_done(self) -> bool:
+        if not self._future.done():
+            return False
+
+        exception: Optional[BaseException] = self._future.exception()
+        if exception is not None:
+            logging.error(f"{self._description} failed: {exception}")
+
+        return True
+
+    def failed(self) -> bool:
+        return self._future.done() and self._future.exception() is not None
+
+    def next_check(self) -> Optional[datetime]:
+        return datetime.min if self._future.done() else None
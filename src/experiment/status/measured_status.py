@@ -0,0 +1,38 @@
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.experiment.status.base_status import BaseStatus
+from src.metrics import Metrics
+
+
+class MeasuredStatus(BaseStatus):
+
+    __slots__ = ("_status", "_metric", "_start", "_labels", "_is_done")
+
+    def __init__(self, status: BaseStatus, metric: str, start: float):
+        self._status: BaseStatus = status
+        self._metric: str = metric
+        self._start: float = start
+        self._labels: Dict[str, str] = Metrics.current_labels()
+        self._is_done: bool = False
+
+    def is_done(self) -> bool:
+        if self._is_done:
+            return True
+
+        if not self._status.is_done():
+            return False
+
+        self._is_done = True
+        Metrics.record(self._metric, time.perf_counter() - self._start, self._status.failed(), self._labels)
+        return True
+
+    def failed(self) -> bool:
+        return self._status.failed()
+
+    def blocks_host(self) -> bool:
+        return self._status.blocks_host()
+
+    def next_check(self) -> Optional[datetime]:
+        return self._status.next_check()
@@ -3,5 +3,7 @@ from src.experiment.status.base_status import BaseStatus
 
 class NotDoneStatus(BaseStatus):
 
+    __slots__ = ()
+
     def is_done(self) -> bool:
         return False
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from src.experiment.status.await_all_status import AwaitAllStatus
+from src.experiment.status.base_status import BaseStatus
+
+
+class SequenceStatus(BaseStatus):
+
+    __slots__ = ("_status", "_continuation")
+
+    def __init__(self, status: BaseStatus, continuation: Callable[[], List[BaseStatus]]):
+        self._status: BaseStatus = status
+        self._continuation: Optional[Callable[[], List[BaseStatus]]] = continuation
+
+    def is_done(self) -> bool:
+        if self._continuation is not None:
+            if not self._status.is_done():
+                return False
+
+            self._status = AwaitAllStatus(self._continuation())
+            self._continuation = None
+
+        return self._status.is_done()
+
+    def next_check(self) -> Optional[datetime]:
+        return self._status.next_check()
@@ -0,0 +1,70 @@
+import math
+from typing import Dict, Any, List, Tuple, Iterator, Sequence
+
+
+class Sweep:
+    class Range:
+
+        def __init__(self, name: str, properties: Dict[str, Any]):
+            for key in ("from", "to"):
+                if key not in properties or not isinstance(properties[key], (int, float)):
+                    raise Exception(f"Sweep of parameter \"{name}\" requires a numeric \"{key}\"!")
+
+            self._start: float = properties["from"]
+            self._step: float = properties["step"] if "step" in properties else 1
+            if not isinstance(self._step, (int, float)) or self._step == 0:
+                raise Exception(f"Sweep of parameter \"{name}\" requires a non-zero numeric \"step\"!")
+
+            # "to" is inclusive, the small epsilon keeps e.g. 0.1 .. 0.3 in steps of 0.1 from losing its last value
+            self._length: int = max(0, math.floor((properties["to"] - self._start) / self._step + 1e-9) + 1)
+            self._is_integral: bool = all(isinstance(value, int) for value in (self._start, self._step))
+
+        def __len__(self) -> int:
+            return self._length
+
+        def __getitem__(self, index: int) -> Any:
+            value: float = self._start + index * self._step
+            return value if self._is_integral else round(value, 12)
+
+    def __init__(self, properties: Dict[str, Any]):
+        # values are computed from the index of a point, so that not even large sweeps are expanded up front
+        self._axes: List[Tuple[str, Sequence[Any]]] = []
+        for name, values in properties.items():
+            if isinstance(values, list):
+                axis: Sequence[Any] = values
+            elif isinstance(values, dict):
+                axis = Sweep.Range(name, values)
+            else:
+                raise Exception(f"Sweep of parameter \"{name}\" must be a list of values or a range!")
+
+            if len(axis) == 0:
+                raise Exception(f"Sweep of parameter \"{name}\" has no values!")
+
+            self._axes.append((name, axis))
+
+        self._length: int = 1
+        for _, axis in self._axes:
+            self._length *= len(axis)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def parameter_names(self) -> List[str]:
+        return [name for name, _ in self._axes]
+
+    def point(self, index: int) -> Dict[str, str]:
+        if index < 0 or index >= self._length:
+            raise Exception(f"Sweep has no point {index + 1}, it only has {self._length} point(s)!")
+
+        # the index is decoded as a mixed-radix number, the last parameter changes fastest
+        values: Dict[str, str] = {}
+        for name, axis in reversed(self._axes):
+            index, position = divmod(index, len(axis))
+            values[name] = str(axis[position])
+
+        return values
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for index in range(self._length):
+            yield self.point(index)
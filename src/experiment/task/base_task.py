@@ -1,6 +1,9 @@
+import copy
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Callable, Optional, Pattern
+from datetime import timedelta
+from threading import Lock
+from typing import Dict, Any, Optional, Pattern, List, Type
 
 from src.experiment.configurable import Configurable
 from src.experiment.status.base_status import BaseStatus
@@ -9,46 +12,74 @@ from src.utility import to_bool
 
 class BaseTask(Configurable, ABC):
 
+    __slots__ = ("_host",)
+    _is_shareable: bool = True
+
+    _registry: Optional[Dict[str, Type["BaseTask"]]] = None
+    _registry_lock: Lock = Lock()
+
+    @staticmethod
+    def registry() -> Dict[str, Type["BaseTask"]]:
+        if BaseTask._registry is not None:
+            return BaseTask._registry
+
+        with BaseTask._registry_lock:
+            if BaseTask._registry is None:
+                from src.experiment.task.bash_task import BashTask
+                from src.experiment.task.collect_task import CollectTask
+                from src.experiment.task.echo_task import EchoTask
+                from src.experiment.task.mkdir_task import MkDirTask
+                from src.experiment.task.screen_task import ScreenTask
+                from src.experiment.task.sleep_task import SleepTask
+                from src.experiment.task.upload_task import UploadTask
+
+                BaseTask._registry = {task_type.type(): task_type
+                                      for task_type in (BashTask, CollectTask, EchoTask, MkDirTask, ScreenTask, SleepTask, UploadTask)}
+
+        return BaseTask._registry
+
     @staticmethod
-    def sub_task_factory() -> Dict[str, Callable[[str, Dict[str, Any]], "BaseTask"]]:
-        from src.experiment.task.bash_task import BashTask
-        from src.experiment.task.echo_task import EchoTask
-        from src.experiment.task.mkdir_task import MkDirTask
-        from src.experiment.task.screen_task import ScreenTask
-        from src.experiment.task.sleep_task import SleepTask
-
-        return {
-            BashTask.type(): BashTask,
-            EchoTask.type(): EchoTask,
-            MkDirTask.type(): MkDirTask,
-            ScreenTask.type(): ScreenTask,
-            SleepTask.type(): SleepTask,
-        }
+    def register(task_type: Type["BaseTask"]) -> Type["BaseTask"]:
+        # can be used as a class decorator by modules that provide additional task types
+        registry: Dict[str, Type[BaseTask]] = BaseTask.registry()
+        with BaseTask._registry_lock:
+            if task_type.type() in registry and registry[task_type.type()] is not task_type:
+                raise Exception(f"Task type \"{task_type.type()}\" is already registered!")
+
+            registry[task_type.type()] = task_type
+
+        return task_type
 
     @staticmethod
-    def try_create(host: str, properties: Dict[str, Any]) -> Optional["BaseTask"]:
+    def try_create(properties: Dict[str, Any]) -> Optional["BaseTask"]:
         if "type" not in properties:
             return None
 
-        factory: Dict[str, Callable[[str, Dict[str, Any]], "BaseTask"]] = BaseTask.sub_task_factory()
+        registry: Dict[str, Type[BaseTask]] = BaseTask.registry()
 
-        if properties["type"] not in factory:
+        if properties["type"] not in registry:
             logging.warning(f"\"{properties['type']}\" is not a known TaskType. Task will be ignored.")
             return None
 
-        return factory[properties["type"]](host, properties)
+        return registry[properties["type"]](properties)
 
     @staticmethod
     @abstractmethod
     def type() -> str:
         raise NotImplementedError
 
-    def __init__(self, host: str, properties: Dict[str, Any]):
+    def __init__(self, properties: Dict[str, Any]):
         super().__init__(properties)
-        self._host: str = host
+        self._host: Optional[str] = None
 
         self._validate_parameters()
 
+    def for_host(self, host: str) -> "BaseTask":
+        # tasks are defined once per phase and shared by all hosts, a view shares the already validated definition
+        view: BaseTask = copy.copy(self)
+        view._host = host
+        return view
+
     def _initialize_cache(self):
         self._fill_cache("ssh", to_bool, True)
         self._fill_cache("parameters")
@@ -74,7 +105,7 @@ class BaseTask(Configurable, ABC):
             raise Exception(f"Value of parameter \"{parameter_name}\" (\"{self.parameters[parameter_name]}\") must match \"{pattern}\"!")
 
     @property
-    def host(self) -> str:
+    def host(self) -> Optional[str]:
         return self._host
 
     @property
@@ -88,3 +119,16 @@ class BaseTask(Configurable, ABC):
     @abstractmethod
     def execute(self, experiment: Any) -> BaseStatus:
         raise NotImplementedError
+
+    def commands(self, experiment: Any) -> List[str]:
+        return []
+
+    def blocks_host(self) -> bool:
+        return False
+
+    def dispatch_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        # time spent within `execute`, i.e. before the next task of the host can be started
+        return round_trip_time * len(self.commands(experiment))
+
+    def estimated_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        return self.dispatch_duration(experiment, round_trip_time)
@@ -1,14 +1,20 @@
-from typing import Any
+import logging
+from datetime import timedelta
+from typing import Any, Optional, List
 
 from src.command.base_command_executor import BaseCommandExecutor
+from src.command.command_process import CommandProcess
+from src.experiment.status.command_status import CommandStatus
 from src.experiment.task.base_task import BaseTask
 from src.experiment.status.base_status import BaseStatus
-from src.experiment.status.done_status import DoneStatus
-from src.utility import assert_is_experiment
+from src.output_capture import OutputCapture
+from src.utility import assert_is_experiment, to_timespan
 
 
 class BashTask(BaseTask):
 
+    __slots__ = ()
+
     @staticmethod
     def type() -> str:
         return "bash"
@@ -20,7 +26,46 @@ class BashTask(BaseTask):
         from src.experiment.experiment import Experiment
         experiment: Experiment = assert_is_experiment(experiment)
 
+        command: str = self.commands(experiment)[0]
+        timeout: Optional[timedelta] = None
+        if "timeout" in self.parameters:
+            timeout = to_timespan(experiment.parameters.resolve(self.host, self.parameters["timeout"]))
+
+        header: str = f"BASH -> {self.host}"
+        log: OutputCapture.Log = OutputCapture.of(experiment.name, experiment.runner.current_phase_name, self.host)
+        log.write("night-shift", command)
+
+        # output is streamed line by line, so that it never has to be kept in memory as a whole
+        is_debug_enabled: bool = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        def handle_stdout(line: str) -> None:
+            log.write("stdout", line)
+            if is_debug_enabled:
+                logging.debug(f"{header} (stdout): {line}")
+
+        def handle_stderr(line: str) -> None:
+            log.write("stderr", line)
+            if is_debug_enabled:
+                logging.debug(f"{header} (stderr): {line}")
+
         cmd: BaseCommandExecutor = experiment.get_command_executor(self)
-        cmd.execute(experiment.parameters.resolve(self.host, self.parameters["command"]))
+        process: CommandProcess = cmd.start(command,
+                                            timeout,
+                                            stdout_handler=handle_stdout,
+                                            stderr_handler=handle_stderr,
+                                            exit_handler=BaseStatus.notify_change)
+
+        return CommandStatus(process, f"{header}: \"{command}\"")
+
+    def commands(self, experiment: Any) -> List[str]:
+        return [experiment.parameters.resolve(self.host, self.parameters["command"])]
+
+    def blocks_host(self) -> bool:
+        return True
+
+    def dispatch_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        # the command is started in the background
+        return timedelta()
 
-        return DoneStatus()
+    def estimated_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        return round_trip_time
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+import posixpath
+import tarfile
+from datetime import timedelta
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from src.command.base_command_executor import BaseCommandExecutor
+from src.experiment.status.base_status import BaseStatus
+from src.experiment.task.transfer_task import TransferTask
+from src.utility import assert_is_experiment
+
+
+class CollectTask(TransferTask):
+
+    __slots__ = ()
+
+    @staticmethod
+    def type() -> str:
+        return "collect"
+
+    def _validate_parameters(self) -> None:
+        self._validate_parameter("source", str)
+
+    def execute(self, experiment: Any) -> BaseStatus:
+        from src.experiment.experiment import Experiment
+        experiment: Experiment = assert_is_experiment(experiment)
+
+        source: str = experiment.parameters.resolve(self.host, self.parameters["source"]).rstrip("/")
+        destination: Path = self._local_directory(experiment)
+
+        cmd: BaseCommandExecutor = experiment.get_command_executor(self)
+        return self._submit(f"COLLECT {self.host}:{source} -> {destination}",
+                            self._collect, cmd, source, destination)
+
+    def _local_directory(self, experiment: Any) -> Path:
+        # results of each repetition are kept apart, e.g. "./results/experiment/run-1/repetition-3/host01"
+        root: str = self.parameters["destination"] if "destination" in self.parameters else "./results"
+        directory: Path = (Path(experiment.parameters.resolve(self.host, root)).expanduser()
+                           / experiment.name
+                           / f"run-{experiment.parameters.value(self.host, 'experiment-run')}")
+
+        # ... and so are the points of a sweep, e.g. "./results/experiment/run-1/point-7/repetition-3/host01"
+        if experiment.parameters.value(self.host, "experiment-points") != "1":
+            directory /= f"point-{experiment.parameters.value(self.host, 'experiment-point')}"
+
+        return directory / f"repetition-{experiment.parameters.value(self.host, 'experiment-repetition')}" / self.host
+
+    def commands(self, experiment: Any) -> List[str]:
+        source: str = experiment.parameters.resolve(self.host, self.parameters["source"]).rstrip("/")
+        return [self._checksum_command(source), self._archive_command(source)]
+
+    def dispatch_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        # the transfer runs in the background
+        return timedelta()
+
+    def estimated_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        return round_trip_time * 2
+
+    @staticmethod
+    def _checksum_command(source: str) -> str:
+        return (f"cd {posixpath.dirname(source) or '.'} && "
+                f"find {posixpath.basename(source)} -type f -print0 | xargs -0 -r sha256sum")
+
+    def _archive_command(self, source: str) -> str:
+        # the names of the files to transfer are passed via stdin, so that there is no limit on their number
+        return f"tar -c{'z' if self.compress else ''}f - -C {posixpath.dirname(source) or '.'} --null -T -"
+
+    def _collect(self, cmd: BaseCommandExecutor, source: str, destination: Path) -> None:
+        remote_checksums: Dict[str, str] = {}
+        for line in cmd.execute_streaming(CollectTask._checksum_command(source)):
+            checksum, _, file_name = line.partition("  ")
+            remote_checksums[CollectTask._safe_path(file_name)] = checksum
+
+        files_to_transfer: List[str] = [file_name for file_name, checksum in remote_checksums.items()
+                                        if CollectTask._local_checksum(destination / file_name) != checksum]
+
+        skipped_files: int = len(remote_checksums) - len(files_to_transfer)
+        if len(files_to_transfer) == 0:
+            logging.info(f"COLLECT {self.host}:{source} -> {destination}: "
+                         f"All {skipped_files} file(s) are up to date.")
+            return
+
+        transferred_bytes: List[int] = [0]
+
+        def write_file_names(stream: BinaryIO) -> None:
+            stream.write(b"".join(file_name.encode("utf-8") + b"\0" for file_name in files_to_transfer))
+
+        def extract_archive(stream: BinaryIO) -> None:
+            with tarfile.open(fileobj=stream, mode="r|gz" if self.compress else "r|", bufsize=self.chunk_size) as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+
+                    file_name: str = CollectTask._safe_path(member.name)
+                    transferred_bytes[0] += self._extract_file(archive, member, destination / file_name,
+                                                               remote_checksums.get(file_name))
+
+        cmd.execute_streaming(self._archive_command(source), write_input=write_file_names, read_output=extract_archive)
+
+        logging.info(f"COLLECT {self.host}:{source} -> {destination}: Transferred {len(files_to_transfer)} file(s) "
+                     f"with {transferred_bytes[0]} bytes, {skipped_files} file(s) were up to date.")
+
+    def _extract_file(self, archive: tarfile.TarFile, member: tarfile.TarInfo, target: Path, checksum: Optional[str]) -> int:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary_target: Path = target.with_name(f".{target.name}.part")
+
+        source_stream: Any = archive.extractfile(member)
+        with temporary_target.open("wb") as output_file:
+            writer: TransferTask.HashingWriter = TransferTask.HashingWriter(output_file)
+            while True:
+                chunk: bytes = source_stream.read(self.chunk_size)
+                if not chunk:
+                    break
+
+                writer.write(chunk)
+
+        if checksum is not None and writer.checksum != checksum:
+            os.remove(str(temporary_target))
+            raise Exception(f"Verification of \"{target}\" failed: expected checksum {checksum}, "
+                            f"but received {writer.checksum}!")
+
+        os.replace(str(temporary_target), str(target))
+        return writer.size
+
+    @staticmethod
+    def _safe_path(file_name: str) -> str:
+        path: PurePosixPath = PurePosixPath(posixpath.normpath(file_name))
+        if path.is_absolute() or ".." in path.parts:
+            raise Exception(f"Refusing to collect \"{file_name}\": Path leaves the destination directory!")
+
+        return str(path)
+
+    @staticmethod
+    def _local_checksum(file: Path) -> str:
+        if not file.is_file():
+            return ""
+
+        checksum: Any = hashlib.sha256()
+        with file.open("rb") as input_file:
+            for chunk in iter(lambda: input_file.read(1 << 20), b""):
+                checksum.update(chunk)
+
+        return checksum.hexdigest()
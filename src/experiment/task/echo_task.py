@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, List
 
 from src.command.base_command_executor import BaseCommandExecutor
 from src.experiment.status.base_status import BaseStatus
@@ -9,6 +9,8 @@ from src.utility import assert_is_experiment, to_bool
 
 class EchoTask(BaseTask):
 
+    __slots__ = ()
+
     @staticmethod
     def type() -> str:
         return "echo"
@@ -21,18 +23,21 @@ class EchoTask(BaseTask):
         from src.experiment.experiment import Experiment
         experiment: Experiment = assert_is_experiment(experiment)
 
+        cmd: BaseCommandExecutor = experiment.get_command_executor(self)
+        for command in self.commands(experiment):
+            cmd.execute(command)
+
+        return DoneStatus()
+
+    def commands(self, experiment: Any) -> List[str]:
         overwrite: bool = to_bool(self.parameters["overwrite"]) if "overwrite" in self.parameters else False
         file: str = experiment.parameters.resolve(self.host, self.parameters["file"])
-        lines: str = experiment.parameters.resolve(self.host, list(self.parameters["lines"]))
+        lines: List[str] = experiment.parameters.resolve(self.host, list(self.parameters["lines"]))
         operator: str = ">" if overwrite else ">>"
 
-        cmd: BaseCommandExecutor = experiment.get_command_executor(self)
-        is_first: bool = True
+        commands: List[str] = []
         for line in lines:
-            if not is_first:
-                operator = ">>"
+            commands.append(f"echo \"{line}\" {operator} {file}")
+            operator = ">>"
 
-            cmd.execute(f"echo \"{line}\" {operator} {file}")
-            is_first = False
-
-        return DoneStatus()
+        return commands
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from src.command.base_command_executor import BaseCommandExecutor
 from src.experiment.task.base_task import BaseTask
@@ -9,12 +9,14 @@ from src.utility import assert_is_experiment, to_bool
 
 class MkDirTask(BaseTask):
 
+    __slots__ = ()
+
     @staticmethod
     def type() -> str:
         return "mkdir"
 
-    def __init__(self, host: str, properties: Dict[str, Any]):
-        super().__init__(host, properties)
+    def __init__(self, properties: Dict[str, Any]):
+        super().__init__(properties)
 
     def _validate_parameters(self) -> None:
         self._validate_parameter("paths", list)
@@ -23,15 +25,22 @@ class MkDirTask(BaseTask):
         from src.experiment.experiment import Experiment
         experiment: Experiment = assert_is_experiment(experiment)
 
+        cmd: BaseCommandExecutor = experiment.get_command_executor(self)
+        for command in self.commands(experiment):
+            cmd.execute(command)
+
+        return DoneStatus()
+
+    def commands(self, experiment: Any) -> List[str]:
         clean: bool = to_bool(self.parameters["clean"]) if "clean" in self.parameters else True
 
-        cmd: BaseCommandExecutor = experiment.get_command_executor(self)
+        commands: List[str] = []
         for unresolved_path in self.parameters["paths"]:
             resolved_path: str = experiment.parameters.resolve(self.host, unresolved_path)
             command: str = f"mkdir -p {resolved_path}"
             if clean:
                 command += f" && rm -rf {resolved_path}/*"
 
-            cmd.execute(command)
+            commands.append(command)
 
-        return DoneStatus()
+        return commands
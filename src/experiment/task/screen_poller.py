@@ -0,0 +1,122 @@
+from datetime import datetime
+from typing import Dict, List, Set, Any, Optional
+
+from src.command.base_command_executor import BaseCommandExecutor
+
+
+class ScreenPoller:
+    # separates the output of the commands that are batched into one
+    SEPARATOR: str = "--night-shift-poll--"
+    # longer lines are truncated by the terminal of the session, the logs of many sessions are tailed in several batches
+    MAX_COMMAND_LENGTH: int = 3072
+
+    _pollers: Dict[BaseCommandExecutor, "ScreenPoller"] = {}
+
+    @staticmethod
+    def of(cmd: BaseCommandExecutor) -> "ScreenPoller":
+        if cmd not in ScreenPoller._pollers:
+            ScreenPoller._pollers[cmd] = ScreenPoller(cmd)
+
+        return ScreenPoller._pollers[cmd]
+
+    def __init__(self, cmd: BaseCommandExecutor):
+        self._cmd: BaseCommandExecutor = cmd
+        self._pending_status: List[Any] = []
+
+    def register(self, status: Any) -> None:
+        from src.experiment.task.screen_task import ScreenTask
+        assert isinstance(status, ScreenTask.Status)
+
+        self._pending_status.append(status)
+
+    def poll(self) -> None:
+        now: datetime = datetime.now()
+        if not any(status.is_due(now) for status in self._pending_status):
+            return
+
+        # the logs are tailed by the same round trip, right after the sessions have been listed
+        outputs: List[Optional[List[str]]] = []
+        running_sessions: Set[str] = self._running_sessions(self._execute_batched(outputs))
+        sessions_to_quit: List[str] = []
+
+        for status, output in zip(self._pending_status, outputs):
+            is_running: bool = status.screen_name in running_sessions
+            if output is not None:
+                status.receive_output(output, not is_running)
+
+            if not is_running:
+                status.resolve()
+                continue
+
+            if not status.is_due(now):
+                continue
+
+            status.schedule_next_check()
+            if now >= status.force_quit:
+                sessions_to_quit.append(status.screen_name)
+                status.resolve()
+
+        if len(sessions_to_quit) > 0:
+            self._cmd.execute("; ".join(f"screen -X -S '{name}' quit" for name in sessions_to_quit))
+
+        self._pending_status = [status for status in self._pending_status if not status.is_resolved]
+        if len(self._pending_status) == 0:
+            ScreenPoller._pollers.pop(self._cmd, None)
+
+    def _execute_batched(self, outputs: List[Optional[List[str]]]) -> List[str]:
+        # returns the output of "screen -ls", `outputs` receives the output of the log of each pending status
+        from src.experiment.task.screen_task import ScreenTask
+
+        output_commands: List[Optional[str]] = [status.output_command for status in self._pending_status]
+        batches: List[List[str]] = [["screen -ls"]]
+        batch_length: int = len(ScreenTask.Status.TAIL_FUNCTION)
+        for output_command in output_commands:
+            if output_command is None:
+                continue
+
+            if batch_length + len(output_command) > ScreenPoller.MAX_COMMAND_LENGTH and len(batches[-1]) > 1:
+                batches.append([])
+                batch_length = len(ScreenTask.Status.TAIL_FUNCTION)
+
+            batches[-1].append(output_command)
+            batch_length += len(output_command) + len(ScreenPoller.SEPARATOR) + 12
+
+        responses: List[List[str]] = []
+        for batch in batches:
+            command: str = f"; echo '{ScreenPoller.SEPARATOR}'; ".join(batch)
+            if batch != ["screen -ls"]:
+                command = f"{ScreenTask.Status.TAIL_FUNCTION}; {command}"
+
+            responses += ScreenPoller._split(self._cmd.execute(command), len(batch))
+
+        output_responses: List[List[str]] = responses[1:]
+        for output_command in output_commands:
+            outputs.append(output_responses.pop(0) if output_command is not None else None)
+
+        return responses[0]
+
+    @staticmethod
+    def _split(response: List[str], parts: int) -> List[List[str]]:
+        split_response: List[List[str]] = [[]]
+        for line in response:
+            if line.strip() == ScreenPoller.SEPARATOR and len(split_response) < parts:
+                split_response.append([])
+                continue
+
+            split_response[-1].append(line)
+
+        # a truncated response must not shift the output of the other sessions
+        return split_response + [[] for _ in range(parts - len(split_response))]
+
+    def _running_sessions(self, response: List[str]) -> Set[str]:
+        # e.g. "\t12345.session-name\t(01/01/2020 12:00:00 AM)\t(Detached)"
+        sessions: Set[str] = set()
+        for line in response:
+            columns: List[str] = line.strip().split("\t")
+            process_and_name: List[str] = columns[0].split(".", 1)
+            if len(columns) < 2 or len(process_and_name) < 2 or not process_and_name[0].isdigit():
+                continue
+
+            sessions.add(process_and_name[1])
+
+        return sessions
@@ -1,40 +1,247 @@
+import logging
+import random
 from datetime import timedelta, datetime
-from typing import Any, List
+from typing import Any, Optional, List, Callable, Tuple
 
 from src.command.base_command_executor import BaseCommandExecutor
+from src.command.remote_agent import RemoteAgent
 from src.experiment.status.base_status import BaseStatus
 from src.experiment.status.done_status import DoneStatus
 from src.experiment.task.base_task import BaseTask
+from src.experiment.task.screen_poller import ScreenPoller
+from src.output_capture import OutputCapture
 from src.utility import assert_is_experiment, to_bool, to_timespan
 
 
 class ScreenTask(BaseTask):
     class Status(BaseStatus):
+        # adaptive polling checks soon after the start and backs off up to the check interval
+        INITIAL_CHECK_INTERVAL: timedelta = timedelta(seconds=1)
+        # checks of sessions that were started together are spread, so that they do not hit the host at once
+        JITTER: float = 0.2
+        # output of the session is fetched in chunks, so that not even huge outputs have to be kept in memory
+        OUTPUT_CHUNK_BYTES: int = 1024 * 1024
+        # prints the new end of the file first, followed by the output that has been logged since the given offset.
+        # A file that is smaller than before has been recreated, so it is read from the start
+        TAIL_FUNCTION_NAME: str = "night_shift_tail"
+        TAIL_FUNCTION: str = (f"{TAIL_FUNCTION_NAME}() {{ s=$(wc -c 2>/dev/null < \"$1\" || echo 0); o=$2; "
+                              f"[ \"$s\" -lt \"$o\" ] && o=0; "
+                              f"e=$(( s < o + {OUTPUT_CHUNK_BYTES} ? s : o + {OUTPUT_CHUNK_BYTES} )); "
+                              f"echo \"#$e\"; tail -c +$(( o + 1 )) \"$1\" 2>/dev/null | head -c $(( e - o )) | awk 1; }}")
 
-        def __init__(self, cmd: BaseCommandExecutor, screen_name: str, check_interval: str, timeout: str):
+        __slots__ = ("_cmd", "_poller", "_screen_name", "_is_done", "_check_interval", "_force_quit", "_next_check",
+                     "_start_command", "_is_pushed", "_is_agent_lost", "_is_started", "_exit_code",
+                     "_is_adaptive", "_backoff", "_start", "_expected_end", "_last_running", "_on_finished",
+                     "_log", "_log_file", "_log_offset", "_is_log_complete")
+
+        def __init__(self,
+                     cmd: BaseCommandExecutor,
+                     screen_name: str,
+                     check_interval: str,
+                     timeout: str,
+                     start_command: str,
+                     agent: Optional[RemoteAgent] = None,
+                     is_adaptive: bool = False,
+                     expected_duration: Optional[timedelta] = None,
+                     on_finished: Optional[Callable[[timedelta], None]] = None,
+                     log: Optional[OutputCapture.Log] = None,
+                     log_file: Optional[str] = None):
             self._cmd: BaseCommandExecutor = cmd
+            self._poller: Optional[ScreenPoller] = None
             self._screen_name: str = screen_name
             self._is_done: bool = False
             self._check_interval: timedelta = to_timespan(check_interval)
-            self._force_quit: datetime = datetime.now() + to_timespan(timeout)
-            self._next_check: datetime = datetime.now()
+            self._start: datetime = datetime.now()
+            self._force_quit: datetime = self._start + to_timespan(timeout)
+            self._next_check: datetime = self._start
 
-        def is_done(self) -> bool:
+            self._is_adaptive: bool = is_adaptive
+            self._backoff: timedelta = min(ScreenTask.Status.INITIAL_CHECK_INTERVAL, self._check_interval)
+            # learned from the previous repetitions, checks are tightened around the time the session is expected to end
+            self._expected_end: Optional[datetime] = self._start + expected_duration if expected_duration is not None else None
+            self._last_running: datetime = self._start
+            self._on_finished: Optional[Callable[[timedelta], None]] = on_finished
+            if is_adaptive:
+                self._next_check += self._backoff
+
+            # the session logs to a file on the host, which is tailed by the poller along with its sessions
+            self._log: Optional[OutputCapture.Log] = log
+            self._log_file: Optional[str] = log_file
+            self._log_offset: int = 0
+            self._is_log_complete: bool = self._log is None
+
+            # with an agent, the termination of the session is pushed instead of polled
+            self._start_command: str = start_command
+            self._is_pushed: bool = agent is not None
+            self._is_agent_lost: bool = False
+            self._is_started: bool = agent is None
+            self._exit_code: Optional[int] = None
+
+            if agent is None:
+                self._start_polling()
+                return
+
+            agent.run(ScreenTask.Status._foreground_command(start_command), self._on_exit, self._on_agent_lost)
+
+        @staticmethod
+        def _foreground_command(start_command: str) -> str:
+            # "-D -m" does not fork, so the agent sees the session terminate
+            return start_command.replace("screen -m -d ", "screen -D -m ", 1)
+
+        def _start_polling(self) -> None:
+            # once polling has taken over, the loss of the agent is handled
+            self._is_pushed = False
+            self._is_agent_lost = False
+            self._poller = ScreenPoller.of(self._cmd)
+            self._poller.register(self)
+
+        def _on_exit(self, exit_code: int, duration: float) -> None:
+            # called by the thread of the agent
+            if self._is_done:
+                return
+
+            self._exit_code = exit_code
+            self._is_done = True
+            self._record_duration(timedelta(seconds=duration))
+            BaseStatus.notify_change()
+
+        def _on_agent_lost(self, is_started: bool) -> None:
+            # called by the thread of the agent, the scheduler falls back to polling with its next check
+            self._is_started = is_started
+            self._is_agent_lost = True
+            BaseStatus.notify_change()
+
+        @property
+        def screen_name(self) -> str:
+            return self._screen_name
+
+        @property
+        def force_quit(self) -> datetime:
+            return self._force_quit
+
+        @property
+        def is_resolved(self) -> bool:
+            return self._is_done
+
+        def is_due(self, now: datetime) -> bool:
+            return not self._is_done and now >= self._next_check
+
+        def schedule_next_check(self) -> None:
+            # called whenever a due check found the session still running
             now: datetime = datetime.now()
+            self._last_running = now
 
-            if self._is_done or now < self._next_check:
-                return self._is_done
+            if not self._is_adaptive:
+                self._next_check += self._check_interval
+                return
 
-            response: List[str] = self._cmd.execute(f"screen -ls '{self._screen_name}' | grep '{self._screen_name}'")
-            self._is_done = len(response) == 0
-            self._next_check += self._check_interval
+            interval: timedelta = self._backoff
+            self._backoff = min(self._backoff * 2, self._check_interval)
 
-            if not self._is_done and now >= self._force_quit:
-                self._cmd.execute(f"screen -X -S '{self._screen_name}' quit")
-                self._is_done = True
+            if self._expected_end is not None:
+                if now < self._expected_end:
+                    # halves the distance to the expected end with each check
+                    interval = min(interval, max((self._expected_end - now) / 2, ScreenTask.Status.INITIAL_CHECK_INTERVAL))
+                else:
+                    # the session takes longer than before, backing off starts over
+                    self._expected_end = None
+                    interval = self._backoff = min(ScreenTask.Status.INITIAL_CHECK_INTERVAL, self._check_interval)
+
+            self._next_check = now + interval * random.uniform(1 - ScreenTask.Status.JITTER, 1)
+
+        def resolve(self) -> None:
+            now: datetime = datetime.now()
+            self._is_done = True
+
+            # sessions that are quit at their timeout say nothing about how long the task takes
+            if now < self._force_quit:
+                # the session ended somewhere between the last two checks
+                self._record_duration((self._last_running - self._start + now - self._start) / 2)
+
+        def _record_duration(self, duration: timedelta) -> None:
+            if self._on_finished is not None:
+                self._on_finished(duration)
+
+        def is_done(self) -> bool:
+            if not self._is_done:
+                if self._is_pushed:
+                    self._check_pushed_status()
+                elif self.is_due(datetime.now()):
+                    self._poller.poll()
+
+            if self._is_done and not self._is_log_complete:
+                # the rest of the output, e.g. of sessions that are quit or reported by the agent.
+                # Commands are only executed by the scheduler, not by the thread of the agent
+                self._fetch_output()
 
             return self._is_done
 
+        @property
+        def output_command(self) -> Optional[str]:
+            # the shell function `TAIL_FUNCTION` has to be defined by the same command
+            if self._is_log_complete:
+                return None
+
+            return f"{ScreenTask.Status.TAIL_FUNCTION_NAME} \"{self._log_file}\" {self._log_offset}"
+
+        def receive_output(self, response: List[str], is_final: bool) -> bool:
+            # returns whether all output that has been logged so far has been received
+            if self._is_log_complete:
+                return True
+
+            if len(response) == 0 or not response[0].strip().startswith("#"):
+                return False
+
+            end: int = int(response[0].strip()[1:])
+            for line in response[1:]:
+                self._log.write("screen", line.rstrip("\r"))
+
+            is_complete: bool = end - self._log_offset < ScreenTask.Status.OUTPUT_CHUNK_BYTES
+            self._log_offset = end
+            # e.g. the poller tails the logs of sessions that it has just found to be terminated
+            self._is_log_complete = is_final and is_complete
+            return is_complete
+
+        def _fetch_output(self) -> None:
+            try:
+                while not self.receive_output(self._cmd.execute(f"{ScreenTask.Status.TAIL_FUNCTION}; {self.output_command}"), True):
+                    pass
+            except BaseException as exception:
+                # capturing the output is best effort, it must not fail the task
+                logging.warning(f"SCREEN {self._screen_name}: Unable to fetch output from \"{self._log_file}\": {exception}")
+
+        def _check_pushed_status(self) -> None:
+            if self._is_agent_lost:
+                if not self._is_started:
+                    self._cmd.execute(self._start_command)
+
+                self._next_check = datetime.now()
+                self._start_polling()
+                self._poller.poll()
+                return
+
+            if datetime.now() >= self._force_quit:
+                self._cmd.execute(f"screen -X -S '{self._screen_name}' quit")
+                self.resolve()
+
+        def failed(self) -> bool:
+            return self._exit_code is not None and self._exit_code != 0
+
+        def next_check(self) -> Optional[datetime]:
+            if self._is_done or self._is_agent_lost:
+                return datetime.min
+
+            if self._is_pushed:
+                # the output of pushed sessions is fetched once they are done
+                return self._force_quit
+
+            return self._next_check
+
+    # sessions log to "<name>.log" in this directory of the host
+    LOG_DIRECTORY: str = "$HOME/.night-shift/screen"
+
+    __slots__ = ()
+
     @staticmethod
     def type() -> str:
         return "screen"
@@ -49,18 +256,91 @@ class ScreenTask(BaseTask):
         experiment: Experiment = assert_is_experiment(experiment)
 
         name: str = experiment.parameters.resolve(self.host, self.parameters["name"])
-        command: str = experiment.parameters.resolve(self.host, self.parameters["command"])
-        wait_for_termination: bool = to_bool(self.parameters["wait-for-termination"]) if "wait-for-termination" in self.parameters else True
         check_termination_interval: str = self.parameters["check-termination-interval"] if "check-termination-interval" in self.parameters else "1m"
         timeout: str = self.parameters["timeout"]
 
         cmd: BaseCommandExecutor = experiment.get_command_executor(self)
-        cmd.execute(f"screen -m -d -S '{name}' bash -c '{command}'")
+        start_command: str = self.commands(experiment)[0]
 
-        if not wait_for_termination:
+        log: Optional[OutputCapture.Log] = None
+        if self.capture_output:
+            log = OutputCapture.of(experiment.name, experiment.runner.current_phase_name, self.host)
+            log.write("night-shift", start_command)
+
+        agent: Optional[RemoteAgent] = None
+        if self.wait_for_termination and self._use_agent(experiment):
+            agent = RemoteAgent.of(cmd)
+
+        # the agent starts the session itself
+        if agent is None:
+            cmd.execute(start_command)
+
+        if not self.wait_for_termination:
             return DoneStatus()
 
+        # repetitions of the same task are expected to take about the same time
+        task: Tuple[str, ...] = (self.host, self.parameters["name"], self.parameters["command"])
+        runner: Experiment.Runner = experiment.runner
+
         return ScreenTask.Status(cmd,
                                  name,
                                  experiment.parameters.resolve(self.host, check_termination_interval),
-                                 experiment.parameters.resolve(self.host, timeout))
+                                 experiment.parameters.resolve(self.host, timeout),
+                                 start_command,
+                                 agent,
+                                 self._polling(experiment) == "adaptive",
+                                 runner.expected_duration(task),
+                                 lambda duration: runner.record_duration(task, duration),
+                                 log,
+                                 ScreenTask._log_file(name) if log is not None else None)
+
+    @property
+    def wait_for_termination(self) -> bool:
+        return to_bool(self.parameters["wait-for-termination"]) if "wait-for-termination" in self.parameters else True
+
+    @property
+    def capture_output(self) -> bool:
+        # opt-in, as "-Logfile" requires GNU screen 4.06 or later on the host
+        return to_bool(self.parameters["capture-output"]) if "capture-output" in self.parameters else False
+
+    @staticmethod
+    def _log_file(name: str) -> str:
+        return f"{ScreenTask.LOG_DIRECTORY}/{name}.log"
+
+    def _use_agent(self, experiment: Any) -> bool:
+        # opt-in per task or for all tasks of a host via the parameter "agent"
+        if "agent" in self.parameters:
+            return to_bool(experiment.parameters.resolve(self.host, str(self.parameters["agent"])))
+
+        return experiment.parameters.has_value(self.host, "agent") and to_bool(experiment.parameters.value(self.host, "agent"))
+
+    def _polling(self, experiment: Any) -> str:
+        # per task or for all tasks of a host via the parameter "polling"
+        polling: str = "adaptive"
+        if "polling" in self.parameters:
+            polling = experiment.parameters.resolve(self.host, str(self.parameters["polling"]))
+        elif experiment.parameters.has_value(self.host, "polling"):
+            polling = str(experiment.parameters.value(self.host, "polling"))
+
+        if polling.lower() not in ("adaptive", "fixed"):
+            raise Exception(f"Polling of screen task \"{self.parameters['name']}\" must be \"adaptive\" or \"fixed\"!")
+
+        return polling.lower()
+
+    def commands(self, experiment: Any) -> List[str]:
+        name: str = experiment.parameters.resolve(self.host, self.parameters["name"])
+        command: str = experiment.parameters.resolve(self.host, self.parameters["command"])
+        if not self.capture_output:
+            return [f"screen -m -d -S '{name}' bash -c '{command}'"]
+
+        # screen appends to its log file, so the output of a previous session with the same name is removed first
+        log_file: str = ScreenTask._log_file(name)
+        return [f"mkdir -p \"{ScreenTask.LOG_DIRECTORY}\" && rm -f \"{log_file}\" && "
+                f"screen -m -d -L -Logfile \"{log_file}\" -S '{name}' bash -c '{command}'"]
+
+    def estimated_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        if not self.wait_for_termination:
+            return self.dispatch_duration(experiment, round_trip_time)
+
+        # the timeout is the upper bound of the runtime, the termination is detected by the next poll
+        return round_trip_time * 2 + to_timespan(experiment.parameters.resolve(self.host, self.parameters["timeout"]))
@@ -1,5 +1,5 @@
 from datetime import timedelta, datetime
-from typing import Any
+from typing import Any, Optional
 
 from src.experiment.status.base_status import BaseStatus
 from src.experiment.task.base_task import BaseTask
@@ -9,12 +9,19 @@ from src.utility import to_timespan
 class SleepTask(BaseTask):
     class Status(BaseStatus):
 
+        __slots__ = ("_end",)
+
         def __init__(self, done_after: timedelta):
             self._end: datetime = datetime.now() + done_after
 
         def is_done(self) -> bool:
             return datetime.now() >= self._end
 
+        def next_check(self) -> Optional[datetime]:
+            return self._end
+
+    __slots__ = ()
+
     @staticmethod
     def type() -> str:
         return "sleep"
@@ -24,3 +31,6 @@ class SleepTask(BaseTask):
 
     def execute(self, experiment: Any) -> BaseStatus:
         return SleepTask.Status(to_timespan(experiment.parameters.resolve(self.host, self.parameters["time"])))
+
+    def estimated_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        return to_timespan(experiment.parameters.resolve(self.host, self.parameters["time"]))
@@ -0,0 +1,80 @@
+import hashlib
+import zlib
+from abc import ABC
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from src.experiment.status.base_status import BaseStatus
+from src.experiment.status.future_status import FutureStatus
+from src.experiment.task.base_task import BaseTask
+from src.utility import to_bool
+
+MAX_PARALLEL_TRANSFERS: int = 16
+DEFAULT_CHUNK_SIZE: int = 1 << 20
+
+
+class TransferTask(BaseTask, ABC):
+    class HashingWriter:
+
+        def __init__(self, stream: Any):
+            self._stream: Any = stream
+            self._checksum: Any = hashlib.sha256()
+            self._size: int = 0
+
+        @property
+        def checksum(self) -> str:
+            return self._checksum.hexdigest()
+
+        @property
+        def size(self) -> int:
+            return self._size
+
+        def write(self, data: bytes) -> int:
+            self._checksum.update(data)
+            self._size += len(data)
+            self._stream.write(data)
+            return len(data)
+
+        def flush(self) -> None:
+            self._stream.flush()
+
+    class GzipWriter:
+
+        def __init__(self, stream: Any, compression_level: int):
+            self._stream: Any = stream
+            self._compressor: Any = zlib.compressobj(compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def write(self, data: bytes) -> int:
+            self._stream.write(self._compressor.compress(data))
+            return len(data)
+
+        def finish(self) -> None:
+            self._stream.write(self._compressor.flush())
+
+    __slots__ = ()
+
+    _transfer_pool: Optional[ThreadPoolExecutor] = None
+    _transfer_pool_lock: Lock = Lock()
+
+    @staticmethod
+    def _submit(description: str, transfer: Callable[..., None], *arguments: Any) -> BaseStatus:
+        with TransferTask._transfer_pool_lock:
+            if TransferTask._transfer_pool is None:
+                TransferTask._transfer_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TRANSFERS,
+                                                                 thread_name_prefix="transfer")
+
+        future: Future = TransferTask._transfer_pool.submit(transfer, *arguments)
+        return FutureStatus(future, description)
+
+    @property
+    def compress(self) -> bool:
+        return to_bool(self.parameters["compress"]) if "compress" in self.parameters else True
+
+    @property
+    def compression_level(self) -> int:
+        return int(self.parameters["compression-level"]) if "compression-level" in self.parameters else 1
+
+    @property
+    def chunk_size(self) -> int:
+        return int(self.parameters["chunk-size"]) if "chunk-size" in self.parameters else DEFAULT_CHUNK_SIZE
@@ -0,0 +1,123 @@
+import logging
+import posixpath
+import tarfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, List, Optional
+from zipfile import ZipFile, ZipInfo
+
+from src.command.base_command_executor import BaseCommandExecutor
+from src.experiment.status.base_status import BaseStatus
+from src.experiment.task.transfer_task import TransferTask
+from src.utility import assert_is_experiment
+
+
+class UploadTask(TransferTask):
+
+    __slots__ = ()
+
+    @staticmethod
+    def type() -> str:
+        return "upload"
+
+    def _validate_parameters(self) -> None:
+        self._validate_parameter("source", str)
+        self._validate_parameter("destination", str)
+
+    def execute(self, experiment: Any) -> BaseStatus:
+        from src.experiment.experiment import Experiment
+        experiment: Experiment = assert_is_experiment(experiment)
+
+        source: Path = Path(experiment.parameters.resolve(self.host, self.parameters["source"])).expanduser()
+        destination: str = experiment.parameters.resolve(self.host, self.parameters["destination"])
+
+        # payloads of ZIP deployments are streamed directly out of the archive
+        archive: Optional[ZipFile] = experiment.archive
+        if archive is not None and len(UploadTask._archive_entries(archive, str(source))) == 0:
+            archive = None
+
+        if archive is None and not source.exists():
+            raise Exception(f"Unable to upload \"{source}\": File or directory does not exist!")
+
+        cmd: BaseCommandExecutor = experiment.get_command_executor(self)
+        return self._submit(f"UPLOAD {source} -> {self.host}:{destination}",
+                            self._upload, cmd, source, destination, archive)
+
+    @staticmethod
+    def _archive_entries(archive: ZipFile, source: str) -> List[ZipInfo]:
+        path: str = posixpath.normpath(source).lstrip("/")
+        return [entry for entry in archive.infolist()
+                if entry.filename.rstrip("/") == path or entry.filename.startswith(path + "/")]
+
+    @staticmethod
+    def _add_archive_entries(tar_archive: tarfile.TarFile, archive: ZipFile, source: Path) -> None:
+        path: str = posixpath.normpath(str(source)).lstrip("/")
+        for entry in UploadTask._archive_entries(archive, str(source)):
+            tar_info: tarfile.TarInfo = tarfile.TarInfo(posixpath.join(source.name, entry.filename[len(path):].strip("/")))
+            tar_info.mtime = int(time.mktime(entry.date_time + (0, 0, -1)))
+            tar_info.mode = (entry.external_attr >> 16) & 0o7777 or (0o755 if entry.is_dir() else 0o644)
+
+            if entry.is_dir():
+                tar_info.type = tarfile.DIRTYPE
+                tar_archive.addfile(tar_info)
+                continue
+
+            tar_info.size = entry.file_size
+            with archive.open(entry) as entry_stream:
+                tar_archive.addfile(tar_info, entry_stream)
+
+    def commands(self, experiment: Any) -> List[str]:
+        return [self._receive_command(experiment.parameters.resolve(self.host, self.parameters["destination"]))]
+
+    def dispatch_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        # the transfer runs in the background
+        return timedelta()
+
+    def estimated_duration(self, experiment: Any, round_trip_time: timedelta) -> timedelta:
+        return round_trip_time
+
+    def _receive_command(self, destination: str) -> str:
+        # the remote reports size and checksum of the received archive, so that we can verify the transfer
+        extract_flags: str = "-xzf" if self.compress else "-xf"
+        return (f"mkdir -p {destination} && "
+                f"archive=$(mktemp) && "
+                f"cat > \"$archive\" && "
+                f"wc -c < \"$archive\" && "
+                f"sha256sum < \"$archive\" && "
+                f"tar {extract_flags} \"$archive\" -C {destination}; "
+                f"status=$?; rm -f \"$archive\"; exit $status")
+
+    def _upload(self, cmd: BaseCommandExecutor, source: Path, destination: str, archive: Optional[ZipFile]) -> None:
+        writers: List[Any] = []
+
+        def write_archive(stream: BinaryIO) -> None:
+            hashing_writer: TransferTask.HashingWriter = TransferTask.HashingWriter(stream)
+            writers.append(hashing_writer)
+
+            archive_stream: Any = hashing_writer
+            if self.compress:
+                archive_stream = TransferTask.GzipWriter(hashing_writer, self.compression_level)
+
+            with tarfile.open(fileobj=archive_stream, mode="w|", bufsize=self.chunk_size) as tar_archive:
+                if archive is not None:
+                    UploadTask._add_archive_entries(tar_archive, archive, source)
+                else:
+                    tar_archive.add(str(source), arcname=source.name)
+
+            if self.compress:
+                archive_stream.finish()
+
+        response: List[str] = cmd.execute_streaming(self._receive_command(destination), write_input=write_archive)
+
+        expected_size: int = writers[0].size
+        expected_checksum: str = writers[0].checksum
+        if len(response) < 2:
+            logging.warning(f"UPLOAD {source} -> {self.host}:{destination}: Unable to verify upload.")
+            return
+
+        if int(response[0].strip()) != expected_size or response[1].split()[0] != expected_checksum:
+            raise Exception(f"Verification failed: expected {expected_size} bytes with checksum {expected_checksum}, "
+                            f"but received {response[0].strip()} bytes with checksum {response[1].split()[0]}!")
+
+        logging.info(f"UPLOAD {source} -> {self.host}:{destination}: Transferred {expected_size} bytes.")
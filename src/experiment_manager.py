@@ -1,78 +1,332 @@
 import logging
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Any, Callable, Dict, Optional
+from typing import List, Any, Callable, Dict, Optional, Set
 from zipfile import ZipFile
 
+from src.command.ssh_connection_pool import SSHConnectionPool
 from src.experiment.experiment import Experiment
-from src.utility import mkdir
+from src.experiment.journal import Journal
+from src.experiment.status.base_status import BaseStatus
+from src.experiment_queue import ExperimentQueue
 
 
 class ExperimentManager:
+    # the next experiment is prepared once a running one has no more than this many phases left after its current one
+    PREPARATION_LEAD_PHASES: int = 1
 
-    def __init__(self):
-        self._experiment_queue: List[Any] = []
-        self._unpack_directory: Path = mkdir("./.unpack/")
-        self._enqueue_handlers: Dict[str, Callable[[Path], None]] = {".zip": self._enqueue_zip,
-                                                                     ".experiment": self._enqueue_experiment}
+    class Deployment:
 
-        self._current_experiment: Optional[Experiment] = None
+        def __init__(self, deployment_file: Path):
+            self.deployment_file: Path = deployment_file
+            self.archive: Optional[ZipFile] = None
+            self.experiments: List[Experiment] = []
 
-    def enqueue(self, deployment_file: Path) -> None:
+    def __init__(self, concurrent: bool = False, aging: timedelta = timedelta(minutes=10)):
+        self._concurrent: bool = concurrent
+        self._experiment_queue: ExperimentQueue = ExperimentQueue(aging)
+        # neither directory is wiped on startup: together they allow to resume experiments after a crash
+        self._archive_directory: Path = ExperimentManager._ensure_directory("./.deployments/")
+        self._journal_directory: Path = ExperimentManager._ensure_directory("./.journal/")
+        self._archives: Dict[str, ZipFile] = {}
+        self._archive_references: Dict[str, int] = {}
+        self._prepare_handlers: Dict[str, Callable[[ExperimentManager.Deployment], None]] = {
+            ".zip": self._prepare_zip,
+            ".experiment": self._prepare_experiment}
+
+        self._running_experiments: List[Experiment] = []
+        self._reserved_hosts: Set[str] = set()
+        self._may_start_experiments: bool = False
+
+        # logins of the next experiment overlap with the final phases of the running ones
+        self._preparation_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preparation")
+        self._preparations: Dict[Experiment, Future] = {}
+
+        self._restore_journals()
+
+    @staticmethod
+    def _ensure_directory(directory: str) -> Path:
+        path: Path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _restore_journals(self) -> None:
+        for journal in Journal.load_all(self._journal_directory):
+            archive: Optional[ZipFile] = None
+            try:
+                if journal.definition["archive"] is not None:
+                    archive = self._open_archive(journal.definition["archive"])
+
+                experiment: Experiment = Experiment(journal.definition["properties"], archive)
+                state: Optional[Dict[str, Any]] = journal.last_state()
+                if state is not None:
+                    experiment.runner.restore(state)
+
+                experiment.journal = journal
+                self._enqueue(experiment)
+            except BaseException as exception:
+                logging.error(f"Unable to resume experiment from journal: {exception}")
+                journal.delete()
+                # the archive is deleted along with the others that are no longer referenced
+                if archive is not None:
+                    self._release_archive(journal.definition["archive"])
+
+        # archives that are not referenced by any journal belong to experiments that are already finished
+        for archive_file in self._archive_directory.iterdir():
+            if str(archive_file.absolute()) not in self._archives:
+                os.remove(str(archive_file.absolute()))
+
+        for archive_file in list(self._archives):
+            self._release_archive(archive_file)
+
+    def _open_archive(self, archive_file: str) -> ZipFile:
+        if archive_file not in self._archives:
+            self._archives[archive_file] = ZipFile(archive_file, "r")
+            # the additional reference is held until all journals are restored
+            self._archive_references[archive_file] = 1
+
+        self._archive_references[archive_file] += 1
+        return self._archives[archive_file]
+
+    def prepare(self, deployment_file: Path) -> "ExperimentManager.Deployment":
+        # parses and journals a deployment on a worker thread of the directory watcher, so it must not touch
+        # the state of the manager: that is up to `enqueue`, which runs on the main thread
+        deployment: ExperimentManager.Deployment = ExperimentManager.Deployment(deployment_file)
         file_extension: str = deployment_file.suffix
 
         try:
-            if file_extension not in self._enqueue_handlers:
+            if file_extension not in self._prepare_handlers:
                 logging.error(f"Unable to enqueue \"{deployment_file.absolute()}\": "
                               f"File extension \"{file_extension}\" is not supported!")
-                return
+                return deployment
 
-            self._enqueue_handlers.get(file_extension)(deployment_file)
+            self._prepare_handlers.get(file_extension)(deployment)
         except BaseException as exception:
             logging.error(f"Unable to enqueue \"{deployment_file.absolute()}\":"
                           f"{exception}")
 
         finally:
-            os.remove(str(deployment_file.absolute()))
+            if deployment_file.exists():
+                os.remove(str(deployment_file.absolute()))
 
-    def _enqueue_zip(self, deployment_file: Path) -> None:
-        file_name: str = deployment_file.stem
-        unpack_dir: Path = mkdir(self._unpack_directory, file_name)
+        return deployment
 
-        with ZipFile(str(deployment_file.absolute()), "r") as zip_file:
-            zip_file.extractall(str(unpack_dir.absolute()))
+    def _prepare_zip(self, deployment: "ExperimentManager.Deployment") -> None:
+        # the archive is never extracted: experiments are read from the central directory and payloads are
+        # streamed out of the archive by the tasks that need them, so we only have to keep the archive around
+        deployment_file: Path = deployment.deployment_file
+        archive_file: Path = self._archive_directory / f"{datetime.now():%Y%m%d%H%M%S%f}-{deployment_file.name}"
 
-        logging.info(f"ZIP: Successfully unpacked experiment.")
-        self._try_extract_experiment(unpack_dir)
+        # the journals reference the archive before it is moved out of the deployment directory: after a crash
+        # in between, their archive is missing and the deployment is simply picked up again on the next start
+        archive: ZipFile = ZipFile(str(deployment_file.absolute()), "r")
+        experiment_files: List[str] = [name for name in archive.namelist()
+                                       if name.endswith(".experiment") and "/" not in name]
+        for experiment_file in experiment_files:
+            try:
+                experiment: Experiment = Experiment.load(Path(experiment_file), archive)
+                self._create_journal(experiment, str(archive_file.absolute()))
+                deployment.experiments.append(experiment)
+            except BaseException as exception:
+                logging.error(f"Unable to enqueue \"{experiment_file}\" from \"{deployment_file.absolute()}\": "
+                              f"{exception}")
+
+        if len(deployment.experiments) == 0:
+            archive.close()
+            return
+
+        # the open archive keeps reading the same file after it has been moved
+        try:
+            shutil.move(str(deployment_file.absolute()), str(archive_file.absolute()))
+        except BaseException:
+            archive.close()
+            for experiment in deployment.experiments:
+                experiment.journal.delete()
 
-    def _enqueue_experiment(self, deployment_file: Path) -> None:
-        file_name: str = deployment_file.stem
-        tmp_dir: Path = mkdir(self._unpack_directory, file_name)
-        shutil.copy(str(deployment_file.absolute()), str(tmp_dir.absolute()))
+            deployment.experiments = []
+            raise
 
-        logging.info(f"EXPERIMENT: Successfully unpacked experiment.")
-        self._try_extract_experiment(tmp_dir)
+        archive.filename = str(archive_file.absolute())
+        Journal.sync_directory(self._archive_directory)
+        Journal.sync_directory(deployment_file.parent)
 
-    def _try_extract_experiment(self, experiment_dir: Path) -> None:
-        for experiment_file in experiment_dir.glob("*.experiment"):
-            experiment: Experiment = Experiment(experiment_file)
-            self._experiment_queue.append(experiment)
-            logging.info(f"Successfully enqueued {experiment.name}.")
+        deployment.archive = archive
 
-        shutil.rmtree(str(experiment_dir.absolute()))
+    def _prepare_experiment(self, deployment: "ExperimentManager.Deployment") -> None:
+        experiment: Experiment = Experiment.load(deployment.deployment_file)
+        self._create_journal(experiment)
+        deployment.experiments.append(experiment)
+
+    def enqueue(self, deployment: "ExperimentManager.Deployment") -> None:
+        if deployment.archive is not None:
+            self._archives[deployment.archive.filename] = deployment.archive
+            self._archive_references[deployment.archive.filename] = len(deployment.experiments)
+
+        for experiment in deployment.experiments:
+            self._enqueue(experiment)
+
+    def _create_journal(self, experiment: Experiment, archive_file: Optional[str] = None) -> None:
+        definition: Dict[str, Any] = {"properties": experiment.properties,
+                                      "archive": archive_file,
+                                      # resumed experiments keep their place in the queue
+                                      "enqueued": datetime.now().timestamp()}
+        experiment.journal = Journal.create(self._journal_directory, experiment.name, definition)
+
+    def _enqueue(self, experiment: Experiment) -> None:
+        enqueued: Optional[datetime] = None
+        if experiment.journal is not None and "enqueued" in experiment.journal.definition:
+            enqueued = datetime.fromtimestamp(experiment.journal.definition["enqueued"])
+
+        entry: ExperimentQueue.Entry = self._experiment_queue.push(experiment, enqueued)
+        self._may_start_experiments = True
+        logging.info(f"Successfully enqueued {experiment.name} as #{entry.identifier} with priority {entry.priority}.")
+
+    @property
+    def queued_experiments(self) -> List[ExperimentQueue.Entry]:
+        return self._experiment_queue.entries()
+
+    def prioritize(self, identifier: int, priority: int) -> None:
+        entry: ExperimentQueue.Entry = self._experiment_queue.reprioritize(identifier, priority)
+        self._may_start_experiments = True
+        logging.info(f"Changed priority of {entry.experiment.name} (#{identifier}) to {priority}.")
+
+    def cancel(self, identifier: int) -> None:
+        entry: ExperimentQueue.Entry = self._experiment_queue.remove(identifier)
+        self._await_preparation(entry.experiment)
+        self._tear_down(entry.experiment)
+        self._may_start_experiments = True
+        logging.info(f"Cancelled {entry.experiment.name} (#{identifier}).")
+
+    def _release_archive(self, archive_file: str, delete: bool = True) -> None:
+        self._archive_references[archive_file] -= 1
+        if self._archive_references[archive_file] > 0:
+            return
+
+        self._archive_references.pop(archive_file)
+        self._archives.pop(archive_file).close()
+        if delete:
+            os.remove(archive_file)
 
     @property
     def current_experiment(self) -> Optional[Experiment]:
-        return self._current_experiment
+        return self._running_experiments[0] if len(self._running_experiments) > 0 else None
+
+    @property
+    def running_experiments(self) -> List[Experiment]:
+        return list(self._running_experiments)
+
+    def next_check(self) -> Optional[datetime]:
+        next_checks: List[datetime] = [experiment.next_check() for experiment in self._running_experiments]
+
+        if self._may_start_experiments:
+            next_checks.append(datetime.min)
+
+        next_checks.append(SSHConnectionPool.shared().next_expiry())
+        next_checks = [next_check for next_check in next_checks if next_check is not None]
+
+        return min(next_checks) if len(next_checks) > 0 else None
 
     def run(self) -> None:
-        if self._current_experiment is None and len(self._experiment_queue) > 0:
-            self._current_experiment = self._experiment_queue.pop(0)
+        SSHConnectionPool.shared().evict_expired()
+
+        if self._may_start_experiments:
+            self._start_queued_experiments()
+
+        for experiment in list(self._running_experiments):
+            if not experiment.run().is_done():
+                continue
+
+            # hands the SSH sessions over to the shared pool, so that the next experiment can reuse them
+            self._tear_down(experiment)
+            self._running_experiments.remove(experiment)
+            self._reserved_hosts.difference_update(experiment.hosts)
+            self._may_start_experiments = len(self._experiment_queue) > 0
+
+        self._prepare_next_experiment()
+
+    def _prepare_next_experiment(self) -> None:
+        if not any(experiment.runner.remaining_phases <= ExperimentManager.PREPARATION_LEAD_PHASES
+                   for experiment in self._running_experiments):
+            return
+
+        entry: Optional[ExperimentQueue.Entry] = self._experiment_queue.peek()
+        if entry is None or entry.experiment in self._preparations:
+            return
+
+        logging.info(f"Preparing {entry.experiment.name}.")
+        preparation: Future = self._preparation_executor.submit(entry.experiment.prepare, set(self._reserved_hosts))
+        preparation.add_done_callback(self._on_prepared)
+        self._preparations[entry.experiment] = preparation
 
-        if self._current_experiment is None:
+    def _on_prepared(self, preparation: Future) -> None:
+        # called on the preparation thread: experiments that wait for their preparation are started on the next pass
+        self._may_start_experiments = True
+        BaseStatus.notify_change()
+
+    def _is_prepared(self, experiment: Experiment) -> bool:
+        preparation: Optional[Future] = self._preparations.get(experiment)
+        return preparation is None or preparation.done()
+
+    def _await_preparation(self, experiment: Experiment) -> None:
+        preparation: Optional[Future] = self._preparations.pop(experiment, None)
+        if preparation is None:
             return
 
-        if self._current_experiment.run().is_done():
-            self._current_experiment.tear_down()
-            self._current_experiment = None
+        try:
+            preparation.result()
+        except BaseException as exception:
+            logging.warning(f"Unable to prepare {experiment.name}: {exception}")
+
+    def _start_queued_experiments(self) -> None:
+        self._may_start_experiments = False
+
+        if not self._concurrent:
+            entry: Optional[ExperimentQueue.Entry] = self._experiment_queue.peek()
+            # the scheduler must not block on logins, an experiment that is still being prepared starts once it is done
+            if len(self._running_experiments) == 0 and entry is not None and self._is_prepared(entry.experiment):
+                self._start_experiment(self._experiment_queue.pop())
+
+            return
+
+        # experiments that are still being prepared keep blocking their hosts for all experiments queued after them
+        for experiment in self._experiment_queue.pop_where(self._is_prepared, self._reserved_hosts):
+            self._start_experiment(experiment)
+
+    def _start_experiment(self, experiment: Experiment) -> None:
+        self._await_preparation(experiment)
+        self._running_experiments.append(experiment)
+        self._reserved_hosts.update(experiment.hosts)
+
+        if self._concurrent:
+            logging.info(f"Starting {experiment.name} on {len(experiment.hosts)} reserved host(s).")
+
+    def _tear_down(self, experiment: Experiment, is_finished: bool = True) -> None:
+        experiment.tear_down()
+
+        if experiment.journal is not None:
+            if is_finished:
+                experiment.journal.delete()
+            else:
+                experiment.journal.close()
+
+        if experiment.archive is not None:
+            self._release_archive(experiment.archive.filename, is_finished)
+
+    def tear_down(self) -> None:
+        # journals of unfinished experiments are kept, so that they are resumed on the next start
+        for experiment in self._running_experiments:
+            self._tear_down(experiment, False)
+
+        for experiment in self._experiment_queue.clear():
+            self._await_preparation(experiment)
+            self._tear_down(experiment, False)
+
+        self._preparation_executor.shutdown(wait=True)
+
+        self._running_experiments = []
+        self._reserved_hosts = set()
+
+        SSHConnectionPool.shared().close()
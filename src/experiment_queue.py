@@ -0,0 +1,205 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Callable, Set, AbstractSet
+
+from src.experiment.experiment import Experiment
+
+
+class ExperimentQueue:
+    class Entry:
+
+        def __init__(self, identifier: int, experiment: Experiment, enqueued: datetime, priority: int, aging: timedelta):
+            self.identifier: int = identifier
+            self.experiment: Experiment = experiment
+            self.enqueued: datetime = enqueued
+            self.priority: int = priority
+            self.key: datetime = ExperimentQueue.Entry._key(experiment, enqueued, priority, aging)
+            # entries are removed lazily: the heap may still hold entries that have been cancelled or reprioritized
+            self.is_valid: bool = True
+
+        @staticmethod
+        def _key(experiment: Experiment, enqueued: datetime, priority: int, aging: timedelta) -> datetime:
+            # each priority level moves an experiment ahead of all experiments that have been enqueued less than
+            # `aging` before it. The key never changes while the experiment waits, so that low priority experiments
+            # are aged without reordering the heap
+            key: datetime = enqueued - aging * priority
+
+            if experiment.deadline is not None:
+                # the latest time at which the experiment has to start to finish before its deadline
+                key = min(key, experiment.deadline - experiment.expected_duration)
+
+            return key
+
+        def reprioritize(self, priority: int, aging: timedelta) -> "ExperimentQueue.Entry":
+            self.is_valid = False
+            return ExperimentQueue.Entry(self.identifier, self.experiment, self.enqueued, priority, aging)
+
+        def __lt__(self, other: "ExperimentQueue.Entry") -> bool:
+            return (self.key, self.identifier) < (other.key, other.identifier)
+
+    def __init__(self, aging: timedelta = timedelta(minutes=10)):
+        self._aging: timedelta = aging
+        self._heap: List[ExperimentQueue.Entry] = []
+        self._entries: Dict[int, ExperimentQueue.Entry] = {}
+        # the head of each host's heap is the first waiting experiment on that host, no later experiment may start on it
+        self._heaps_by_host: Dict[str, List[ExperimentQueue.Entry]] = {}
+        # references held by the heaps of the hosts and the part of them that belongs to queued entries
+        self._host_references: int = 0
+        self._queued_host_references: int = 0
+        self._next_identifier: int = 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> List["ExperimentQueue.Entry"]:
+        return sorted(self._entries.values())
+
+    def push(self, experiment: Experiment, enqueued: Optional[datetime] = None) -> "ExperimentQueue.Entry":
+        entry: ExperimentQueue.Entry = ExperimentQueue.Entry(self._next_identifier,
+                                                             experiment,
+                                                             enqueued if enqueued is not None else datetime.now(),
+                                                             experiment.priority,
+                                                             self._aging)
+        self._next_identifier += 1
+        self._push_entry(entry)
+        return entry
+
+    def _push_entry(self, entry: "ExperimentQueue.Entry") -> None:
+        self._entries[entry.identifier] = entry
+        heapq.heappush(self._heap, entry)
+        for host in set(entry.experiment.hosts):
+            heapq.heappush(self._heaps_by_host.setdefault(host, []), entry)
+
+        self._host_references += len(set(entry.experiment.hosts))
+        self._queued_host_references += len(set(entry.experiment.hosts))
+
+    def peek(self) -> Optional["ExperimentQueue.Entry"]:
+        while len(self._heap) > 0 and not self._heap[0].is_valid:
+            heapq.heappop(self._heap)
+
+        return self._heap[0] if len(self._heap) > 0 else None
+
+    def pop(self) -> Optional[Experiment]:
+        entry: Optional[ExperimentQueue.Entry] = self._pop_entry()
+        if entry is None:
+            return None
+
+        ExperimentQueue._warn_about_missed_deadline(entry.experiment)
+        return entry.experiment
+
+    def pop_where(self, predicate: Callable[[Experiment], bool], blocked_hosts: AbstractSet[str]) -> List[Experiment]:
+        # only experiments that are first in line on all of their hosts are candidates, so that experiments sharing
+        # hosts keep their order. Each pass visits one entry per free host instead of the whole queue
+        blocked_hosts = set(blocked_hosts)
+        candidates: Dict[int, ExperimentQueue.Entry] = {}
+        for host in list(self._heaps_by_host):
+            head: Optional[ExperimentQueue.Entry] = self._peek_host(host)
+            if head is not None and host not in blocked_hosts:
+                candidates[head.identifier] = head
+
+        selected_experiments: List[Experiment] = []
+        for entry in sorted(candidates.values()):
+            hosts: Set[str] = set(entry.experiment.hosts)
+            if not hosts.isdisjoint(blocked_hosts) or any(self._peek_host(host) is not entry for host in hosts):
+                continue
+
+            blocked_hosts.update(hosts)
+            if not predicate(entry.experiment):
+                continue
+
+            self._dequeue(entry)
+            entry.is_valid = False
+            self._discard_from_hosts(entry)
+            ExperimentQueue._warn_about_missed_deadline(entry.experiment)
+            selected_experiments.append(entry.experiment)
+
+        self._compact()
+        return selected_experiments
+
+    def _peek_host(self, host: str) -> Optional["ExperimentQueue.Entry"]:
+        heap: List[ExperimentQueue.Entry] = self._heaps_by_host[host]
+        while len(heap) > 0 and self._entries.get(heap[0].identifier) is not heap[0]:
+            heapq.heappop(heap)
+            self._host_references -= 1
+
+        if len(heap) == 0:
+            self._heaps_by_host.pop(host)
+            return None
+
+        return heap[0]
+
+    def _pop_entry(self) -> Optional["ExperimentQueue.Entry"]:
+        entry: Optional[ExperimentQueue.Entry] = self.peek()
+        if entry is None:
+            return None
+
+        heapq.heappop(self._heap)
+        self._dequeue(entry)
+        self._discard_from_hosts(entry)
+        return entry
+
+    def _dequeue(self, entry: "ExperimentQueue.Entry") -> None:
+        self._entries.pop(entry.identifier)
+        self._queued_host_references -= len(set(entry.experiment.hosts))
+
+    def _discard_from_hosts(self, entry: "ExperimentQueue.Entry") -> None:
+        # a dequeued entry was first in line on all of its hosts, so cleaning up the heads drops its references
+        for host in set(entry.experiment.hosts):
+            if host in self._heaps_by_host:
+                self._peek_host(host)
+
+    @staticmethod
+    def _warn_about_missed_deadline(experiment: Experiment) -> None:
+        if experiment.deadline is None or datetime.now() + experiment.expected_duration <= experiment.deadline:
+            return
+
+        logging.warning(f"EXPERIMENT {experiment.name}: Starting too late to finish before its deadline {experiment.deadline}.")
+
+    def reprioritize(self, identifier: int, priority: int) -> "ExperimentQueue.Entry":
+        previous_entry: ExperimentQueue.Entry = self._get(identifier)
+        entry: ExperimentQueue.Entry = previous_entry.reprioritize(priority, self._aging)
+        self._dequeue(previous_entry)
+        self._push_entry(entry)
+        self._compact()
+        return entry
+
+    def remove(self, identifier: int) -> "ExperimentQueue.Entry":
+        entry: ExperimentQueue.Entry = self._get(identifier)
+        self._dequeue(entry)
+        entry.is_valid = False
+        self._compact()
+        return entry
+
+    def clear(self) -> List[Experiment]:
+        experiments: List[Experiment] = [entry.experiment for entry in self.entries()]
+        self._heap = []
+        self._entries = {}
+        self._heaps_by_host = {}
+        self._host_references = 0
+        self._queued_host_references = 0
+        return experiments
+
+    def _get(self, identifier: int) -> "ExperimentQueue.Entry":
+        if identifier not in self._entries:
+            raise Exception(f"There is no queued experiment with id {identifier}!")
+
+        return self._entries[identifier]
+
+    def _compact(self) -> None:
+        # keeps stale entries from piling up if experiments are reprioritized or cancelled over and over again
+        if len(self._heap) <= 2 * len(self._entries) and self._host_references <= 2 * self._queued_host_references:
+            return
+
+        self._heap = [entry for entry in self._heap if entry.is_valid]
+        heapq.heapify(self._heap)
+
+        self._heaps_by_host = {}
+        for entry in self._heap:
+            for host in set(entry.experiment.hosts):
+                self._heaps_by_host.setdefault(host, []).append(entry)
+
+        for heap in self._heaps_by_host.values():
+            heapq.heapify(heap)
+
+        self._host_references = self._queued_host_references
@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Any, List, Optional, Tuple, IO
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    class Timer:
+
+        def __init__(self, name: str, labels: Dict[str, str]):
+            self._name: str = name
+            self._labels: Dict[str, str] = labels
+            self._start: float = 0.0
+
+        def __enter__(self) -> "Metrics.Timer":
+            self._start = time.perf_counter()
+            return self
+
+        def __exit__(self, exception_type: Any, exception: Any, traceback: Any) -> None:
+            Metrics.record(self._name, time.perf_counter() - self._start, exception_type is not None, self._labels)
+
+    class Labels:
+
+        def __init__(self, labels: Dict[str, str]):
+            self._labels: Dict[str, str] = labels
+            self._previous_labels: Dict[str, str] = {}
+
+        def __enter__(self) -> "Metrics.Labels":
+            self._previous_labels = Metrics.current_labels()
+            Metrics._context.labels = {**self._previous_labels, **self._labels}
+            return self
+
+        def __exit__(self, *args) -> None:
+            Metrics._context.labels = self._previous_labels
+
+    class NullContext:
+
+        def __enter__(self) -> "Metrics.NullContext":
+            return self
+
+        def __exit__(self, *args) -> None:
+            pass
+
+    PHASE_DURATION: str = "night_shift_phase_duration_seconds"
+    PHASE_DISPATCH: str = "night_shift_phase_dispatch_seconds"
+    TASK_EXECUTE: str = "night_shift_task_execute_seconds"
+    TASK_DURATION: str = "night_shift_task_duration_seconds"
+    COMMAND: str = "night_shift_command_seconds"
+    SSH_LOGIN: str = "night_shift_ssh_login_seconds"
+
+    DESCRIPTIONS: Dict[str, str] = {
+        PHASE_DURATION: "Time from the start of a phase until all of its tasks are done.",
+        PHASE_DISPATCH: "Time spent in Phase.run to start the tasks of a phase.",
+        TASK_EXECUTE: "Time spent in BaseTask.execute.",
+        TASK_DURATION: "Time from the start of a task until its status is done.",
+        COMMAND: "Time spent executing a single command.",
+        SSH_LOGIN: "Time spent logging in to a host.",
+    }
+
+    EXPORT_INTERVAL: float = 15.0
+
+    _null_context: "Metrics.NullContext" = NullContext()
+    _context: threading.local = threading.local()
+    _lock: Lock = Lock()
+    _directory: Optional[Path] = None
+    _events_file: Optional[IO[str]] = None
+    # events are serialized when they are exported, so that recording stays cheap
+    _pending_events: List[Tuple[float, str, float, bool, LabelSet]] = []
+    # count, sum of durations, failures and maximum duration by metric name and label set
+    _series: Dict[str, Dict[LabelSet, List[float]]] = {}
+    _last_export: float = 0.0
+
+    @staticmethod
+    def enable(directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        Metrics._directory = directory
+        Metrics._events_file = (directory / "events.jsonl").open("a")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return Metrics._directory is not None
+
+    @staticmethod
+    def current_labels() -> Dict[str, str]:
+        return getattr(Metrics._context, "labels", {})
+
+    @staticmethod
+    def labels(**labels: str) -> Any:
+        # recording has to be free when metrics are disabled, hence the shared no-op context
+        if Metrics._directory is None:
+            return Metrics._null_context
+
+        return Metrics.Labels(labels)
+
+    @staticmethod
+    def timer(name: str, **labels: str) -> Any:
+        if Metrics._directory is None:
+            return Metrics._null_context
+
+        return Metrics.Timer(name, {**Metrics.current_labels(), **labels})
+
+    @staticmethod
+    def record(name: str, duration: float, failed: bool = False, labels: Optional[Dict[str, str]] = None) -> None:
+        if Metrics._directory is None:
+            return
+
+        label_set: LabelSet = tuple(sorted((labels if labels is not None else Metrics.current_labels()).items()))
+
+        with Metrics._lock:
+            if name not in Metrics._series:
+                Metrics._series[name] = {}
+
+            if label_set not in Metrics._series[name]:
+                Metrics._series[name][label_set] = [0, 0.0, 0, 0.0]
+
+            series: List[float] = Metrics._series[name][label_set]
+            series[0] += 1
+            series[1] += duration
+            series[2] += 1 if failed else 0
+            series[3] = max(series[3], duration)
+
+            Metrics._pending_events.append((time.time(), name, duration, failed, label_set))
+
+    @staticmethod
+    def export_if_due() -> None:
+        if Metrics._directory is None or time.monotonic() - Metrics._last_export < Metrics.EXPORT_INTERVAL:
+            return
+
+        Metrics.export()
+
+    @staticmethod
+    def next_export() -> Optional[datetime]:
+        # the scheduler wakes up for the export even if nothing else is due
+        if Metrics._directory is None:
+            return None
+
+        return datetime.now() + timedelta(seconds=max(0.0, Metrics._last_export + Metrics.EXPORT_INTERVAL - time.monotonic()))
+
+    @staticmethod
+    def export() -> None:
+        if Metrics._directory is None:
+            return
+
+        Metrics._last_export = time.monotonic()
+        with Metrics._lock:
+            pending_events: List[Tuple[float, str, float, bool, LabelSet]] = Metrics._pending_events
+            Metrics._pending_events = []
+            series: Dict[str, Dict[LabelSet, List[float]]] = {name: {label_set: list(values)
+                                                                     for label_set, values in series_by_labels.items()}
+                                                              for name, series_by_labels in Metrics._series.items()}
+
+        for timestamp, name, duration, failed, label_set in pending_events:
+            Metrics._events_file.write(json.dumps({"time": timestamp,
+                                                   "metric": name,
+                                                   "duration": duration,
+                                                   "failed": failed,
+                                                   "labels": dict(label_set)}) + "\n")
+
+        Metrics._events_file.flush()
+
+        # scrapers must never see a partially written file
+        metrics_file: Path = Metrics._directory / "metrics.txt"
+        temporary_file: Path = Metrics._directory / "metrics.txt.tmp"
+        with temporary_file.open("w") as output_file:
+            output_file.write(Metrics._to_open_metrics(series))
+
+        os.replace(str(temporary_file), str(metrics_file))
+
+    @staticmethod
+    def _to_open_metrics(series: Dict[str, Dict[LabelSet, List[float]]]) -> str:
+        formatted_labels: Dict[LabelSet, str] = {label_set: Metrics._format_labels(label_set)
+                                                 for series_by_labels in series.values()
+                                                 for label_set in series_by_labels}
+        lines: List[str] = []
+        for name in sorted(series):
+            base_name: str = name[:-len("_seconds")] if name.endswith("_seconds") else name
+
+            lines.append(f"# TYPE {name} summary")
+            lines.append(f"# UNIT {name} seconds")
+            lines.append(f"# HELP {name} {Metrics.DESCRIPTIONS.get(name, name)}")
+            for label_set, (count, total, _, _) in series[name].items():
+                lines.append(f"{name}_count{formatted_labels[label_set]} {int(count)}")
+                lines.append(f"{name}_sum{formatted_labels[label_set]} {total}")
+
+            lines.append(f"# TYPE {base_name}_max_seconds gauge")
+            lines.append(f"# UNIT {base_name}_max_seconds seconds")
+            for label_set, (_, _, _, maximum) in series[name].items():
+                lines.append(f"{base_name}_max_seconds{formatted_labels[label_set]} {maximum}")
+
+            lines.append(f"# TYPE {base_name}_failures counter")
+            for label_set, (_, _, failures, _) in series[name].items():
+                lines.append(f"{base_name}_failures_total{formatted_labels[label_set]} {int(failures)}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_labels(label_set: LabelSet) -> str:
+        if len(label_set) == 0:
+            return ""
+
+        escape = lambda value: str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return "{" + ",".join(f"{name}=\"{escape(value)}\"" for name, value in label_set) + "}"
+
+    @staticmethod
+    def close() -> None:
+        if Metrics._directory is None:
+            return
+
+        Metrics.export()
+        Metrics._events_file.close()
+        Metrics._events_file = None
+        Metrics._directory = None
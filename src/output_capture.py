@@ -0,0 +1,122 @@
+import os
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Tuple, Optional, IO, List, Deque
+
+
+class OutputCapture:
+    class Log:
+
+        def __init__(self, path: Path):
+            self._path: Path = path
+            self._file: Optional[IO[str]] = None
+            self._size: int = 0
+            # output is streamed to the file as it arrives, only the most recent lines are kept for `tail`
+            self._recent_lines: Deque[str] = deque(maxlen=OutputCapture.RECENT_LINES)
+            # lines arrive from reader threads of several commands
+            self._lock: Lock = Lock()
+
+        @property
+        def path(self) -> Path:
+            return self._path
+
+        def write(self, stream: str, line: str) -> None:
+            entry: str = f"{datetime.now():%Y-%m-%d %H:%M:%S} {stream}: {line}"
+            size: int = len(entry.encode("utf-8", errors="replace")) + 1
+
+            with self._lock:
+                self._recent_lines.append(entry)
+
+                if self._file is None:
+                    self._open()
+
+                if self._size > 0 and self._size + size > OutputCapture.MAX_BYTES:
+                    self._rotate()
+
+                self._file.write(entry + "\n")
+                self._size += size
+
+        def recent_lines(self) -> List[str]:
+            with self._lock:
+                return list(self._recent_lines)
+
+        def _open(self) -> None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            # line buffered, so that the file can be tailed while the task is running
+            self._file = self._path.open("a", encoding="utf-8", errors="replace", buffering=1)
+            self._size = self._file.tell()
+
+        def _rotate(self) -> None:
+            # e.g. "host01.log" becomes "host01.log.1", the oldest file is dropped
+            self._file.close()
+            for index in range(OutputCapture.BACKUP_COUNT - 1, 0, -1):
+                source: Path = self._path.with_name(f"{self._path.name}.{index}")
+                if source.exists():
+                    os.replace(str(source), str(self._path.with_name(f"{self._path.name}.{index + 1}")))
+
+            if OutputCapture.BACKUP_COUNT > 0:
+                os.replace(str(self._path), str(self._path.with_name(f"{self._path.name}.1")))
+            else:
+                os.remove(str(self._path))
+
+            self._open()
+
+        def close(self) -> None:
+            # the file is opened again by the next write, e.g. of a screen session that outlives its phase
+            with self._lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+    MAX_BYTES: int = 10 * 1024 * 1024
+    BACKUP_COUNT: int = 3
+    RECENT_LINES: int = 200
+
+    _directory: Path = Path("./logs/")
+    _logs: Dict[Tuple[str, str, str], "OutputCapture.Log"] = {}
+    _lock: Lock = Lock()
+
+    @staticmethod
+    def configure(directory: Path) -> None:
+        OutputCapture._directory = directory
+
+    @staticmethod
+    def of(experiment: str, phase: str, host: str) -> "OutputCapture.Log":
+        key: Tuple[str, str, str] = (experiment, phase, host)
+        with OutputCapture._lock:
+            if key not in OutputCapture._logs:
+                # e.g. "./logs/experiment/phase/host01.log"
+                path: Path = OutputCapture._directory.joinpath(*(name.replace("/", "_") for name in key[:2]),
+                                                               f"{host.replace('/', '_')}.log")
+                OutputCapture._logs[key] = OutputCapture.Log(path)
+
+            return OutputCapture._logs[key]
+
+    @staticmethod
+    def recent_lines(experiment: str) -> Dict[str, List[str]]:
+        with OutputCapture._lock:
+            logs: Dict[Tuple[str, str, str], OutputCapture.Log] = dict(OutputCapture._logs)
+
+        return {f"{phase} @ {host}": log.recent_lines()
+                for (name, phase, host), log in logs.items() if name == experiment}
+
+    @staticmethod
+    def close_phase(experiment: str, phase: str) -> None:
+        # the logs stay available to `tail`, only their files are closed to keep the number of open files bounded
+        with OutputCapture._lock:
+            logs: List[OutputCapture.Log] = [log for key, log in OutputCapture._logs.items()
+                                             if key[0] == experiment and key[1] == phase]
+
+        for log in logs:
+            log.close()
+
+    @staticmethod
+    def close(experiment: str) -> None:
+        with OutputCapture._lock:
+            keys: List[Tuple[str, str, str]] = [key for key in OutputCapture._logs if key[0] == experiment]
+            logs: List[OutputCapture.Log] = [OutputCapture._logs.pop(key) for key in keys]
+
+        for log in logs:
+            log.close()
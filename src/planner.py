@@ -0,0 +1,230 @@
+import heapq
+import socket
+import time
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, TextIO, Tuple
+
+from src.experiment.experiment import Experiment
+from src.experiment.phase import Phase
+from src.experiment.task.base_task import BaseTask
+
+
+class Planner:
+    class TaskEstimate:
+
+        def __init__(self, task: BaseTask, commands: List[str], start: timedelta, end: timedelta):
+            self.task: BaseTask = task
+            self.commands: List[str] = commands
+            self.start: timedelta = start
+            self.end: timedelta = end
+
+    class HostEstimate:
+
+        def __init__(self, host: str, start: timedelta):
+            self.host: str = host
+            self.start: timedelta = start
+            self.dispatched: timedelta = start
+            self.end: timedelta = start
+            self.tasks: List[Planner.TaskEstimate] = []
+
+    class PhaseEstimate:
+
+        def __init__(self, phase: Phase, run: int, point: int, points: int, repetition: int, repetitions: int, start: timedelta):
+            self.phase: Phase = phase
+            self.run: int = run
+            self.point: int = point
+            self.points: int = points
+            self.repetition: int = repetition
+            self.repetitions: int = repetitions
+            self.start: timedelta = start
+            self.end: timedelta = start
+            self.hosts: Dict[str, Planner.HostEstimate] = {}
+
+        @property
+        def critical_host(self) -> Optional["Planner.HostEstimate"]:
+            if len(self.hosts) == 0:
+                return None
+
+            return max(self.hosts.values(), key=lambda host_estimate: host_estimate.end)
+
+    @staticmethod
+    def measure_round_trip_time(host: str, port: int = 22, attempts: int = 3, timeout: float = 5.0) -> Optional[timedelta]:
+        # establishing a TCP connection takes one round trip, which is the lower bound for every remote command
+        round_trip_times: List[float] = []
+        for _ in range(attempts):
+            start: float = time.perf_counter()
+            try:
+                with socket.create_connection((host, port), timeout=timeout):
+                    round_trip_times.append(time.perf_counter() - start)
+            except OSError:
+                continue
+
+        if len(round_trip_times) == 0:
+            return None
+
+        return timedelta(seconds=min(round_trip_times))
+
+    def __init__(self, experiment: Experiment, round_trip_times: Dict[str, timedelta], default_round_trip_time: timedelta):
+        self._experiment: Experiment = experiment
+        self._round_trip_times: Dict[str, timedelta] = round_trip_times
+        self._default_round_trip_time: timedelta = default_round_trip_time
+
+    def round_trip_time(self, task: BaseTask) -> timedelta:
+        if not task.use_ssh:
+            return timedelta()
+
+        return self._round_trip_times.get(task.host, self._default_round_trip_time)
+
+    def plan(self, max_parallel_hosts: Optional[int] = None) -> List["Planner.PhaseEstimate"]:
+        estimates: List[Planner.PhaseEstimate] = []
+        start: timedelta = timedelta()
+
+        # mirrors the order in which `Experiment.Runner` executes runs, sweep points, repetitions and phases
+        runner: Experiment.Runner = self._experiment.runner
+        for run, configuration in enumerate(runner.run_configurations):
+            points: int = len(runner.sweep(run))
+            repetitions: int = configuration["repeat"] if "repeat" in configuration else 1
+            for point in range(points):
+                for repetition in range(1, repetitions + 1):
+                    runner.bind_parameters(run, point, repetition)
+
+                    for phase_name in configuration["phases"]:
+                        phase: Phase = self._experiment.phases[phase_name]
+                        estimate: Planner.PhaseEstimate = Planner.PhaseEstimate(phase, run, point, points,
+                                                                                repetition, repetitions, start)
+                        self._estimate_phase(estimate,
+                                             max_parallel_hosts if max_parallel_hosts is not None else phase.max_parallel_hosts)
+
+                        estimates.append(estimate)
+                        start = estimate.end
+
+        return estimates
+
+    def _estimate_phase(self, estimate: "Planner.PhaseEstimate", max_parallel_hosts: int) -> None:
+        tasks_by_host: Dict[str, List[BaseTask]] = estimate.phase.tasks_by_host()
+
+        # hosts are dispatched by a pool of workers, a worker is free again as soon as `execute` returned for all tasks
+        # of its host (or the first task that blocks the host has been started)
+        workers: List[timedelta] = [estimate.start] * max(1, min(max_parallel_hosts, len(tasks_by_host)))
+        for host, tasks in tasks_by_host.items():
+            worker_start: timedelta = heapq.heappop(workers)
+            host_estimate: Planner.HostEstimate = self._estimate_host(host, tasks, worker_start)
+            heapq.heappush(workers, host_estimate.dispatched)
+
+            estimate.hosts[host] = host_estimate
+            estimate.end = max(estimate.end, host_estimate.end)
+
+    def _estimate_host(self, host: str, tasks: List[BaseTask], start: timedelta) -> "Planner.HostEstimate":
+        estimate: Planner.HostEstimate = Planner.HostEstimate(host, start)
+        is_blocked: bool = False
+        cursor: timedelta = start
+
+        for task in tasks:
+            round_trip_time: timedelta = self.round_trip_time(task)
+            dispatch_duration: timedelta = task.dispatch_duration(self._experiment, round_trip_time)
+            end: timedelta = cursor + task.estimated_duration(self._experiment, round_trip_time)
+
+            estimate.tasks.append(Planner.TaskEstimate(task, task.commands(self._experiment), cursor, end))
+            estimate.end = max(estimate.end, end)
+
+            if task.blocks_host():
+                # all remaining tasks are started by the scheduler once this one is done
+                if not is_blocked:
+                    estimate.dispatched = cursor + dispatch_duration
+                    is_blocked = True
+
+                cursor = end
+            else:
+                cursor += dispatch_duration
+
+        if not is_blocked:
+            estimate.dispatched = cursor
+
+        return estimate
+
+    def report(self, output: TextIO) -> None:
+        estimates: List[Planner.PhaseEstimate] = self.plan()
+        total: timedelta = Planner._total(estimates)
+
+        print(f"EXPERIMENT {self._experiment.name}: {len(self._experiment.runner.run_configurations)} run(s), "
+              f"{len(estimates)} phase execution(s) on {len(self._experiment.hosts)} host(s)", file=output)
+        for host in self._experiment.hosts:
+            round_trip_time: timedelta = self._round_trip_times.get(host, self._default_round_trip_time)
+            print(f"  round trip time {host}: {round_trip_time.total_seconds() * 1000:.1f} ms", file=output)
+
+        self._report_commands(estimates, output)
+        self._report_critical_path(estimates, output)
+        self._report_idle_hosts(estimates, total, output)
+
+        sequential_total: timedelta = Planner._total(self.plan(1))
+        parallel_total: timedelta = Planner._total(self.plan(len(self._experiment.hosts)))
+        print(f"\nEstimated duration: {Planner._format(total)} "
+              f"(sequential dispatch: {Planner._format(sequential_total)}, "
+              f"parallel dispatch: {Planner._format(parallel_total)})", file=output)
+
+    @staticmethod
+    def _report_commands(estimates: List["Planner.PhaseEstimate"], output: TextIO) -> None:
+        for estimate in estimates:
+            print(f"\nRUN {estimate.run + 1}, "
+                  + (f"POINT {estimate.point + 1} / {estimate.points}, " if estimate.points > 1 else "")
+                  + f"REPETITION {estimate.repetition} / {estimate.repetitions}: {estimate.phase.name} "
+                  f"[{Planner._format(estimate.start)} - {Planner._format(estimate.end)}]", file=output)
+
+            for host_estimate in estimate.hosts.values():
+                print(f"  {host_estimate.host} [{Planner._format(host_estimate.start)} - {Planner._format(host_estimate.end)}]",
+                      file=output)
+
+                for task_estimate in host_estimate.tasks:
+                    task: BaseTask = task_estimate.task
+                    print(f"    {task.type()}{'' if task.use_ssh else ' (local)'} "
+                          f"[{Planner._format(task_estimate.start)} - {Planner._format(task_estimate.end)}]", file=output)
+
+                    for command in task_estimate.commands:
+                        print(f"      $ {command}", file=output)
+
+    @staticmethod
+    def _report_critical_path(estimates: List["Planner.PhaseEstimate"], output: TextIO) -> None:
+        # phases are executed one after another, so the critical path passes through the slowest host of each phase
+        critical_tasks: Dict[Tuple[str, str, str], List[Any]] = {}
+        for estimate in estimates:
+            host_estimate: Optional[Planner.HostEstimate] = estimate.critical_host
+            if host_estimate is None or len(host_estimate.tasks) == 0:
+                continue
+
+            task_estimate: Planner.TaskEstimate = max(host_estimate.tasks, key=lambda t: t.end)
+            key: Tuple[str, str, str] = (estimate.phase.name, host_estimate.host, task_estimate.task.type())
+            if key not in critical_tasks:
+                critical_tasks[key] = [0, timedelta()]
+
+            critical_tasks[key][0] += 1
+            critical_tasks[key][1] += estimate.end - estimate.start
+
+        print(f"\nCritical path:", file=output)
+        for (phase_name, host, task_type), (count, duration) in critical_tasks.items():
+            print(f"  {phase_name} -> {host} -> {task_type}: {count}x, {Planner._format(duration)}", file=output)
+
+    def _report_idle_hosts(self, estimates: List["Planner.PhaseEstimate"], total: timedelta, output: TextIO) -> None:
+        print(f"\nHost utilization:", file=output)
+        for host in self._experiment.hosts:
+            busy: timedelta = timedelta()
+            idle_phases: List[str] = []
+            for estimate in estimates:
+                if host not in estimate.hosts or len(estimate.hosts[host].tasks) == 0:
+                    if estimate.phase.name not in idle_phases:
+                        idle_phases.append(estimate.phase.name)
+
+                    continue
+
+                busy += estimate.hosts[host].end - estimate.start
+
+            utilization: float = busy / total if total > timedelta() else 0.0
+            print(f"  {host}: busy {Planner._format(busy)}, idle {Planner._format(total - busy)} ({utilization * 100:.1f} % utilized)"
+                  + (f", no tasks in {', '.join(idle_phases)}" if len(idle_phases) > 0 else ""), file=output)
+
+    @staticmethod
+    def _total(estimates: List["Planner.PhaseEstimate"]) -> timedelta:
+        return estimates[-1].end if len(estimates) > 0 else timedelta()
+
+    @staticmethod
+    def _format(duration: timedelta) -> str:
+        return str(timedelta(milliseconds=round(duration.total_seconds() * 1000)))
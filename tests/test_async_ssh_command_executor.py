@@ -0,0 +1,138 @@
+import getpass
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import List, Optional
+
+from src.command import async_ssh_command_executor
+from src.command.async_ssh_command_executor import AsyncSSHCommandExecutor
+from src.command.command_process import CommandProcess
+
+
+class LocalSSHServer:
+    # an sshd on localhost that only accepts a key of its own, so that the tests run without touching ~/.ssh
+
+    def __init__(self, directory: Path):
+        self._directory: Path = directory
+        self._process: Optional[subprocess.Popen] = None
+        self.port: int = LocalSSHServer._free_port()
+        self.user: str = getpass.getuser()
+        self.identity: Path = directory / "id_ed25519"
+
+    @staticmethod
+    def executable() -> Optional[str]:
+        return shutil.which("sshd") or next((path for path in ("/usr/sbin/sshd", "/usr/local/sbin/sshd")
+                                             if Path(path).exists()), None)
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            return probe.getsockname()[1]
+
+    def start(self) -> None:
+        host_key: Path = self._directory / "host_ed25519"
+        for key in (host_key, self.identity):
+            subprocess.run(["ssh-keygen", "-q", "-t", "ed25519", "-N", "", "-f", str(key)], check=True)
+
+        shutil.copy(str(self.identity.with_suffix(".pub")), str(self._directory / "authorized_keys"))
+        configuration: Path = self._directory / "sshd_config"
+        configuration.write_text(f"ListenAddress 127.0.0.1\n"
+                                 f"Port {self.port}\n"
+                                 f"HostKey {host_key}\n"
+                                 f"AuthorizedKeysFile {self._directory / 'authorized_keys'}\n"
+                                 f"PidFile {self._directory / 'sshd.pid'}\n"
+                                 f"PasswordAuthentication no\n"
+                                 f"StrictModes no\n"
+                                 f"UsePAM no\n")
+
+        self._process = subprocess.Popen([LocalSSHServer.executable(), "-D", "-e", "-f", str(configuration)],
+                                         stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+
+        deadline: float = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), 0.5).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+
+        raise Exception(f"sshd did not listen on port {self.port}!")
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+
+
+class LocalSSHCommandExecutor(AsyncSSHCommandExecutor):
+
+    def __init__(self, server: LocalSSHServer):
+        self._server: LocalSSHServer = server
+        super().__init__("127.0.0.1", server.user, server.port)
+
+    def _ssh_arguments(self, command: Optional[str] = None) -> List[str]:
+        arguments: List[str] = super()._ssh_arguments(command)
+        return arguments[:1] + ["-i", str(self._server.identity),
+                                "-o", "IdentitiesOnly=yes",
+                                "-o", "StrictHostKeyChecking=no",
+                                "-o", "UserKnownHostsFile=/dev/null",
+                                "-o", "LogLevel=ERROR"] + arguments[1:]
+
+
+@unittest.skipIf(LocalSSHServer.executable() is None, "sshd is not installed")
+class AsyncSSHCommandExecutorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        cls._control_socket_directory: Path = async_ssh_command_executor.CONTROL_SOCKET_DIRECTORY
+        async_ssh_command_executor.CONTROL_SOCKET_DIRECTORY = Path(cls._directory.name) / "control"
+
+        cls._server: LocalSSHServer = LocalSSHServer(Path(cls._directory.name))
+        cls._server.start()
+        cls._cmd: LocalSSHCommandExecutor = LocalSSHCommandExecutor(cls._server)
+
+    @classmethod
+    def tearDownClass(cls):
+        # the control master would otherwise persist beyond the tests
+        subprocess.run(cls._cmd._ssh_arguments()[:-1] + ["-O", "exit", f"{cls._server.user}@127.0.0.1"],
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        cls._server.stop()
+        async_ssh_command_executor.CONTROL_SOCKET_DIRECTORY = cls._control_socket_directory
+        cls._directory.cleanup()
+
+    def test_login_does_not_wait_for_the_control_master(self):
+        start: float = time.monotonic()
+        self.assertEqual(["hello"], self._cmd.execute("echo hello"))
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(1, len(list(async_ssh_command_executor.CONTROL_SOCKET_DIRECTORY.iterdir())))
+
+    def test_exit_code_and_stderr(self):
+        result = self._cmd.execute_result("echo out; echo err >&2; exit 3")
+
+        self.assertEqual(["out"], result.stdout)
+        self.assertEqual(["err"], result.stderr)
+        self.assertEqual(3, result.exit_code)
+
+    def test_started_command_streams_its_output(self):
+        lines: List[str] = []
+        process: CommandProcess = self._cmd.start("for i in 1 2 3; do echo line$i; done", stdout_handler=lines.append)
+
+        deadline: float = time.monotonic() + 10
+        while not process.poll():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+
+        self.assertEqual(["line1", "line2", "line3"], lines)
+        self.assertEqual(0, process.exit_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime, timedelta
+from typing import List, Any
+
+from src.experiment_queue import ExperimentQueue
+
+
+class QueuedExperiment:
+
+    def __init__(self, name: str, hosts: List[str]):
+        self.name: str = name
+        self.hosts: List[str] = hosts
+        self.priority: int = 0
+        self.deadline: Any = None
+        self.expected_duration: timedelta = timedelta()
+
+
+class ExperimentQueueTest(unittest.TestCase):
+
+    def test_pop_where_keeps_order_of_experiments_sharing_hosts(self):
+        queue: ExperimentQueue = self._queue([("a", ["h1"]), ("b", ["h1", "h2"]), ("c", ["h2"]), ("d", ["h3"])])
+
+        started: List[Any] = queue.pop_where(lambda experiment: experiment.name != "a", set())
+
+        self.assertEqual(["d"], [experiment.name for experiment in started])
+        self.assertEqual(["a", "b", "c"], [entry.experiment.name for entry in queue.entries()])
+
+    def test_pop_where_skips_reserved_hosts(self):
+        queue: ExperimentQueue = self._queue([("a", ["h1"]), ("b", ["h2"])])
+
+        started: List[Any] = queue.pop_where(lambda experiment: True, {"h1"})
+
+        self.assertEqual(["b"], [experiment.name for experiment in started])
+
+    def test_pop_releases_host_references(self):
+        queue: ExperimentQueue = self._queue([(str(index), [f"h{index % 5}", "shared"]) for index in range(100)])
+
+        while queue.pop() is not None:
+            pass
+
+        self.assertEqual({}, queue._heaps_by_host)
+        self.assertEqual(0, queue._host_references)
+
+    @staticmethod
+    def _queue(experiments: List[Any]) -> ExperimentQueue:
+        queue: ExperimentQueue = ExperimentQueue()
+        enqueued: datetime = datetime.now()
+        for index, (name, hosts) in enumerate(experiments):
+            queue.push(QueuedExperiment(name, hosts), enqueued + timedelta(seconds=index))
+
+        return queue
+
+
+if __name__ == "__main__":
+    unittest.main()
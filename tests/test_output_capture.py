@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.output_capture import OutputCapture
+
+
+class OutputCaptureTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        OutputCapture.configure(Path(self._directory.name))
+
+    def tearDown(self):
+        OutputCapture.close("output-test")
+        self._directory.cleanup()
+
+    def test_lines_are_written_through(self):
+        log: OutputCapture.Log = OutputCapture.of("output-test", "run", "host01")
+        log.write("stdout", "first")
+
+        self.assertTrue(log.path.read_text().endswith("stdout: first\n"))
+
+    def test_finished_phase_closes_its_files_but_keeps_recent_lines(self):
+        log: OutputCapture.Log = OutputCapture.of("output-test", "run", "host01")
+        log.write("stdout", "first")
+
+        OutputCapture.close_phase("output-test", "run")
+        self.assertIsNone(log._file)
+        self.assertEqual(1, len(OutputCapture.recent_lines("output-test")["run @ host01"]))
+
+        log.write("stdout", "second")
+        self.assertEqual(2, len(log.path.read_text().splitlines()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from typing import Dict, Any
+
+from src.experiment.experiment import Experiment
+from src.experiment.status.base_status import BaseStatus
+from src.output_capture import OutputCapture
+
+
+class PhaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self._output_file: Path = Path(self._directory.name) / "out"
+        OutputCapture.configure(Path(self._directory.name) / "logs")
+
+    def tearDown(self):
+        OutputCapture.close("phase-test")
+        self._directory.cleanup()
+
+    def test_blocking_common_task_holds_back_specific_tasks_sequentially(self):
+        self._run_phase(1)
+        self.assertEqual(["common", "specific"], self._output_file.read_text().split())
+
+    def test_blocking_common_task_holds_back_specific_tasks_in_parallel(self):
+        self._run_phase(8)
+        self.assertEqual(["common", "specific"], self._output_file.read_text().split())
+
+    def _run_phase(self, max_parallel_hosts: int) -> None:
+        experiment: Experiment = Experiment(self._properties(max_parallel_hosts))
+        status: BaseStatus = experiment.phases["order"].run()
+
+        deadline: float = time.monotonic() + 10
+        while not status.is_done():
+            self.assertLess(time.monotonic(), deadline, "phase did not finish")
+            time.sleep(0.05)
+
+        experiment.tear_down()
+
+    def _properties(self, max_parallel_hosts: int) -> Dict[str, Any]:
+        return {
+            "name": "phase-test",
+            "hosts": ["localhost"],
+            "max-parallel-hosts": max_parallel_hosts,
+            "parameters": {"common": {"out": str(self._output_file)}},
+            "phases": [{
+                "name": "order",
+                "do": {
+                    "common": [{"ssh": False, "type": "bash", "parameters": {"command": "sleep 1; echo common >> {{out}}"}}],
+                    "specific": [{"hosts": ["localhost"], "ssh": False, "type": "bash",
+                                  "parameters": {"command": "echo specific >> {{out}}"}}]
+                }
+            }],
+            "run": [{"phases": ["order"]}]
+        }
+
+
+if __name__ == "__main__":
+    unittest.main()